@@ -0,0 +1,38 @@
+# User value: This test keeps cancellation fast and reliable for users stopping OCR/transcription jobs.
+import unittest
+
+from worker import cancel
+
+
+class CancelUnitTests(unittest.TestCase):
+    # User value: ensures a cancel signal seen on the channel short-circuits the Redis check.
+    def test_locally_noted_cancel_skips_redis(self):
+        cancel.note_cancelled("unit-job-1")
+
+        self.assertTrue(cancel.cancelled_locally("unit-job-1"))
+        self.assertTrue(cancel.is_cancelled("unit-job-1", r=object()))
+
+    # User value: ensures the local cancel cache stays bounded on long-running workers.
+    def test_local_cancel_cache_is_bounded(self):
+        original = cancel._CANCELLED_IDS_MAX
+        cancel._CANCELLED_IDS_MAX = 2
+        try:
+            for job_id in ("unit-a", "unit-b", "unit-c"):
+                cancel.note_cancelled(job_id)
+            self.assertFalse(cancel.cancelled_locally("unit-a"))
+            self.assertTrue(cancel.cancelled_locally("unit-c"))
+        finally:
+            cancel._CANCELLED_IDS_MAX = original
+
+    # User value: ensures cancel checks reuse one Redis pool instead of reconnecting each time.
+    def test_fallback_client_is_reused(self):
+        original = cancel._client
+        cancel._client = None
+        try:
+            self.assertIs(cancel._redis_client(), cancel._redis_client())
+        finally:
+            cancel._client = original
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,19 @@
+# User value: This test keeps status timestamps accurate while they are cached per second.
+import unittest
+from datetime import datetime, timezone
+
+from worker.utils.clock import utc_now_iso
+
+
+class ClockUnitTests(unittest.TestCase):
+    # User value: ensures cached timestamps keep the naive UTC ISO format status readers expect.
+    def test_utc_now_iso_is_naive_utc_seconds(self):
+        stamp = utc_now_iso()
+        parsed = datetime.fromisoformat(stamp)
+        self.assertIsNone(parsed.tzinfo)
+        self.assertEqual(parsed.microsecond, 0)
+        self.assertLess(abs((datetime.now(timezone.utc).replace(tzinfo=None) - parsed).total_seconds()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
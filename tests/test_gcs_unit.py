@@ -0,0 +1,66 @@
+# User value: This test keeps downloaded job inputs from piling up on worker disks.
+import os
+import unittest
+
+from worker.cancel import JobCancelledError
+
+os.environ.setdefault("GCS_BUCKET_NAME", "unit-bucket")
+try:
+    from worker.utils import gcs
+except ImportError:  # google-cloud-storage is not installed
+    gcs = None
+
+
+class _FakeBlob:
+    # User value: supports download_to_filename so the OCR/transcription journey stays clear and reliable.
+    def download_to_filename(self, path):
+        with open(path, "wb") as f:
+            f.write(b"audio")
+
+
+class _FakeBucket:
+    # User value: supports blob so the OCR/transcription journey stays clear and reliable.
+    def blob(self, path):
+        return _FakeBlob()
+
+
+class _FakeClient:
+    # User value: supports bucket so the OCR/transcription journey stays clear and reliable.
+    def bucket(self, name):
+        return _FakeBucket()
+
+
+@unittest.skipUnless(gcs is not None, "google-cloud-storage is not installed")
+class DownloadedInputUnitTests(unittest.TestCase):
+    # User value: supports setUp so the OCR/transcription journey stays clear and reliable.
+    def setUp(self):
+        self._get_client = gcs._get_client
+        gcs._get_client = lambda: _FakeClient()
+
+    # User value: supports tearDown so the OCR/transcription journey stays clear and reliable.
+    def tearDown(self):
+        gcs._get_client = self._get_client
+
+    # User value: ensures a job cancelled before chunking still removes its downloaded input.
+    def test_input_is_removed_when_job_is_cancelled_before_chunking(self):
+        seen = []
+        with self.assertRaises(JobCancelledError):
+            with gcs.downloaded_input("gs://unit-bucket/jobs/1/talk.mp3", probe_size=True) as local_path:
+                seen.append(local_path)
+                self.assertTrue(os.path.exists(local_path))
+                raise JobCancelledError("cancelled")
+
+        self.assertEqual(os.path.basename(seen[0]), "talk.mp3")
+        self.assertFalse(os.path.exists(os.path.dirname(seen[0])))
+
+    # User value: ensures two jobs with the same file name never share a local path.
+    def test_same_file_name_gets_separate_paths(self):
+        with gcs.downloaded_input("gs://unit-bucket/a/talk.mp3") as first:
+            with gcs.downloaded_input("gs://unit-bucket/b/talk.mp3") as second:
+                self.assertNotEqual(first, second)
+            self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(first))
+
+
+if __name__ == "__main__":
+    unittest.main()
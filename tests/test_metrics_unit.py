@@ -0,0 +1,69 @@
+# User value: This test keeps worker metrics accurate while their log output is batched.
+import unittest
+
+from worker import metrics
+
+
+class MetricsUnitTests(unittest.TestCase):
+    # User value: keeps the background flusher from racing the explicit flushes below.
+    @classmethod
+    def setUpClass(cls):
+        cls._interval = metrics.METRICS_FLUSH_INTERVAL_SEC
+        metrics.METRICS_FLUSH_INTERVAL_SEC = 3600.0
+
+    # User value: restores the configured flush interval for other tests.
+    @classmethod
+    def tearDownClass(cls):
+        metrics.METRICS_FLUSH_INTERVAL_SEC = cls._interval
+
+    # User value: ensures buffered counter updates are emitted once per flush with the summed delta.
+    def test_counter_updates_are_aggregated_until_flush(self):
+        metrics.incr("unit_jobs_total", queue="q1")
+        metrics.incr("unit_jobs_total", amount=2, queue="q1")
+
+        with self.assertLogs("worker.metrics", level="INFO") as captured:
+            metrics.flush()
+
+        records = [r for r in captured.records if getattr(r, "metric_name", "") == "unit_jobs_total|queue=q1"]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].delta, 3)
+        self.assertEqual(metrics.snapshot()["counters"]["unit_jobs_total|queue=q1"], records[0].total)
+
+    # User value: ensures buffered timer observations report count and mean latency.
+    def test_timer_observations_are_aggregated_until_flush(self):
+        metrics.observe_ms("unit_latency_ms", 10.0)
+        metrics.observe_ms("unit_latency_ms", 30.0)
+
+        with self.assertLogs("worker.metrics", level="INFO") as captured:
+            metrics.flush()
+
+        records = [r for r in captured.records if getattr(r, "metric_name", "") == "unit_latency_ms"]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].count, 2)
+        self.assertEqual(records[0].mean_ms, 20.0)
+        self.assertEqual(records[0].max_ms, 30.0)
+        self.assertFalse(hasattr(records[0], "value_ms"))
+
+    # User value: ensures value_ms still carries a raw observation for existing dashboards.
+    def test_single_timer_observation_keeps_value_ms(self):
+        metrics.observe_ms("unit_single_latency_ms", 12.5)
+
+        with self.assertLogs("worker.metrics", level="INFO") as captured:
+            metrics.flush()
+
+        records = [r for r in captured.records if getattr(r, "metric_name", "") == "unit_single_latency_ms"]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].value_ms, 12.5)
+        self.assertEqual(records[0].count, 1)
+
+    # User value: ensures prebuilt label pairs resolve to the same series as keyword tags.
+    def test_label_pairs_match_keyword_tags(self):
+        metrics.incr("unit_labelled_total", queue="q2", source="CLOUD", job_type="OCR")
+        metrics.incr_labels("unit_labelled_total", (("job_type", "OCR"), ("queue", "q2"), ("source", "CLOUD")))
+
+        counters = metrics.snapshot()["counters"]
+        self.assertEqual(counters["unit_labelled_total|job_type=OCR|queue=q2|source=CLOUD"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+# User value: This test keeps progress reporting timely while avoiding redundant status writes.
+import unittest
+
+from worker.utils import progress
+
+
+class ProgressUnitTests(unittest.TestCase):
+    # User value: ensures rapid page/chunk steps collapse into one visible update.
+    def test_updates_inside_interval_are_skipped(self):
+        self.assertTrue(progress.progress_due("unit-progress-1"))
+        self.assertFalse(progress.progress_due("unit-progress-1"))
+
+    # User value: ensures the final step of a job is always reported.
+    def test_forced_update_always_passes(self):
+        self.assertTrue(progress.progress_due("unit-progress-2"))
+        self.assertTrue(progress.progress_due("unit-progress-2", force=True))
+
+    # User value: ensures one job's updates never hold back another job's.
+    def test_jobs_are_throttled_independently(self):
+        self.assertTrue(progress.progress_due("unit-progress-3"))
+        self.assertTrue(progress.progress_due("unit-progress-4"))
+
+    # User value: ensures long-running workers do not accumulate per-job state forever.
+    def test_tracked_jobs_are_bounded(self):
+        original = progress._MAX_TRACKED_JOBS
+        progress._MAX_TRACKED_JOBS = 2
+        try:
+            for job_id in ("unit-a", "unit-b", "unit-c"):
+                progress.progress_due(job_id)
+            self.assertNotIn("unit-a", progress._last_progress_at)
+            self.assertLessEqual(len(progress._last_progress_at), 2)
+        finally:
+            progress._MAX_TRACKED_JOBS = original
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+# User value: This test keeps prompt lookup and output naming consistent across OCR and transcription.
+import os
+import tempfile
+import unittest
+
+from worker.utils.filenames import normalize_output_filename
+from worker.utils.prompts import load_named_prompt
+
+
+class PromptsUnitTests(unittest.TestCase):
+    # User value: ensures a named prompt is cut out between its header and end marker.
+    def test_load_named_prompt_extracts_block(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+            f.write("### PROMPT: DEMO_PROMPT\nTranscribe verbatim.\n=== END PROMPT ===\n### OTHER\nx\n")
+        try:
+            self.assertEqual(load_named_prompt(f.name, "DEMO_PROMPT"), "Transcribe verbatim.")
+        finally:
+            os.unlink(f.name)
+
+    # User value: ensures repeated per-page lookups do not re-read the prompt file.
+    def test_load_named_prompt_is_cached(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+            f.write("### CACHED\nfirst\n=== END PROMPT ===\n")
+        try:
+            self.assertEqual(load_named_prompt(f.name, "CACHED"), "first")
+            os.unlink(f.name)
+            self.assertEqual(load_named_prompt(f.name, "CACHED"), "first")
+        finally:
+            if os.path.exists(f.name):
+                os.unlink(f.name)
+
+    # User value: ensures output files get safe .txt names users can download.
+    def test_normalize_output_filename(self):
+        self.assertEqual(normalize_output_filename("My Lecture (1).mp3"), "My_Lecture_1.txt")
+        self.assertEqual(normalize_output_filename(None), "transcript.txt")
+        self.assertEqual(normalize_output_filename("***.pdf"), "transcript.txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,83 @@
 # User value: This file helps users get reliable OCR/transcription results with clear processing behavior.
+import re
 import unittest
 
-from worker.status_machine import is_allowed_transition
+from worker import status_machine
+from worker.status_machine import (
+    CLAIM_LUA,
+    FINALIZE_LUA,
+    claim_for_processing,
+    finalize_completed,
+    is_allowed_transition,
+)
+
+
+# User value: reads the blocked-status tables out of a Lua script so the fake runs the real guards.
+def _lua_blocked_sets(source):
+    return [set(re.findall(r"\['(\w+)'\]", table)) for table in re.findall(r"\(\{([^}]*)\}\)\[s\]", source)]
+
+
+class _FakeScript:
+    # User value: supports __init__ so the OCR/transcription journey stays clear and reliable.
+    def __init__(self, source):
+        self.source = source
+        self.blocked = _lua_blocked_sets(source)
+
+    # User value: mirrors the claim/finalize Lua control flow against a fake hash.
+    def __call__(self, keys, args, client):
+        data = client.hashes.setdefault(keys[0], {})
+        s = str(data.get("status") or "").strip().upper()
+        if self.source == CLAIM_LUA:
+            n = int(args[0])
+            if data.get("cancel_requested") == "1" or s == "CANCELLED":
+                if s in self.blocked[0]:
+                    return [b"BLOCKED_CANCELLED", s.encode()]
+                client.hset_pairs(data, args[1:n + 1])
+                return [b"CANCELLED", s.encode()]
+            if s in self.blocked[1]:
+                return [b"BLOCKED", s.encode()]
+            client.hset_pairs(data, args[n + 1:])
+            return [b"PROCESSING", s.encode()]
+        if s in ("WAITING_APPROVAL", "APPROVED", "CANCELLED"):
+            return [b"SKIPPED", s.encode()]
+        if s in self.blocked[0]:
+            return [b"BLOCKED", s.encode()]
+        if not data.get("stage"):
+            data["stage"] = args[0]
+        client.hset_pairs(data, args[1:])
+        return [b"COMPLETED", s.encode()]
+
+
+class _FakeRedis:
+    # User value: supports __init__ so the OCR/transcription journey stays clear and reliable.
+    def __init__(self, data):
+        self.hashes = {"job_status:1": dict(data)}
+
+    # User value: supports register_script so the OCR/transcription journey stays clear and reliable.
+    def register_script(self, source):
+        return _FakeScript(source)
+
+    # User value: supports hset_pairs so the OCR/transcription journey stays clear and reliable.
+    @staticmethod
+    def hset_pairs(data, items):
+        for field, value in zip(items[::2], items[1::2]):
+            data[field] = value
+
+    # User value: supports status so the OCR/transcription journey stays clear and reliable.
+    def status(self):
+        return self.hashes["job_status:1"].get("status")
+
+
+_CANCELLED_ARGV = ("status", "CANCELLED", "stage", "Cancelled")
+_PROCESSING_ARGV = ("status", "PROCESSING", "stage", "Processing")
+_COMPLETED_ARGV = ("status", "COMPLETED", "progress", "100")
 
 
 class StatusMachineUnitTests(unittest.TestCase):
+    # User value: keeps each test on its own fake scripts instead of ones cached by an earlier test.
+    def setUp(self):
+        status_machine._SCRIPTS.clear()
+
     # User value: keeps users updated with live OCR/transcription progress.
     def test_terminal_statuses_are_sticky(self):
         self.assertTrue(is_allowed_transition("COMPLETED", "COMPLETED"))
@@ -23,6 +96,77 @@ class StatusMachineUnitTests(unittest.TestCase):
         self.assertTrue(is_allowed_transition("QUEUED", ""))
         self.assertTrue(is_allowed_transition(None, None))
 
+    # User value: ensures the atomic claim/finalize scripts block the same transitions as the Python guard.
+    def test_lua_guards_mirror_allowed_transitions(self):
+        self.assertIn("{['CANCELLED'] = true, ['COMPLETED'] = true, ['FAILED'] = true}", CLAIM_LUA)
+        self.assertIn("{['COMPLETED'] = true, ['FAILED'] = true}", CLAIM_LUA)
+        self.assertIn("{['CANCELLED'] = true, ['FAILED'] = true}", FINALIZE_LUA)
+        self.assertFalse(is_allowed_transition("FAILED", "COMPLETED"))
+
+
+    # User value: ensures a queued job is claimed and marked PROCESSING.
+    def test_claim_marks_queued_job_processing(self):
+        r = _FakeRedis({"status": "QUEUED"})
+        outcome = claim_for_processing(
+            r, key="job_status:1", cancelled_argv=_CANCELLED_ARGV, processing_argv=_PROCESSING_ARGV, context="UNIT"
+        )
+        self.assertEqual(outcome, ("PROCESSING", "QUEUED"))
+        self.assertEqual(r.status(), "PROCESSING")
+
+    # User value: ensures a job cancelled before it starts is never processed.
+    def test_claim_cancels_job_with_pending_cancel_request(self):
+        r = _FakeRedis({"status": "QUEUED", "cancel_requested": "1"})
+        outcome = claim_for_processing(
+            r, key="job_status:1", cancelled_argv=_CANCELLED_ARGV, processing_argv=_PROCESSING_ARGV, context="UNIT"
+        )
+        self.assertEqual(outcome, ("CANCELLED", "QUEUED"))
+        self.assertEqual(r.hashes["job_status:1"]["stage"], "Cancelled")
+
+    # User value: ensures finished jobs are not restarted or relabelled by a redelivered message.
+    def test_claim_blocks_terminal_jobs(self):
+        r = _FakeRedis({"status": "COMPLETED"})
+        outcome = claim_for_processing(
+            r, key="job_status:1", cancelled_argv=_CANCELLED_ARGV, processing_argv=_PROCESSING_ARGV, context="UNIT"
+        )
+        self.assertEqual(outcome, ("BLOCKED", "COMPLETED"))
+        self.assertEqual(r.status(), "COMPLETED")
+
+        r = _FakeRedis({"status": "FAILED", "cancel_requested": "1"})
+        outcome = claim_for_processing(
+            r, key="job_status:1", cancelled_argv=_CANCELLED_ARGV, processing_argv=_PROCESSING_ARGV, context="UNIT"
+        )
+        self.assertEqual(outcome, ("BLOCKED_CANCELLED", "FAILED"))
+        self.assertEqual(r.status(), "FAILED")
+
+    # User value: ensures a finished job is marked COMPLETED with a stage even when none was stored.
+    def test_finalize_completes_processing_job(self):
+        r = _FakeRedis({"status": "PROCESSING"})
+        outcome = finalize_completed(
+            r, key="job_status:1", default_stage="Completed", completed_argv=_COMPLETED_ARGV, context="UNIT"
+        )
+        self.assertEqual(outcome, ("COMPLETED", "PROCESSING"))
+        self.assertEqual(r.status(), "COMPLETED")
+        self.assertEqual(r.hashes["job_status:1"]["stage"], "Completed")
+
+    # User value: ensures jobs awaiting approval or cancelled mid-run keep their status.
+    def test_finalize_skips_approval_and_cancelled_jobs(self):
+        for status in ("WAITING_APPROVAL", "APPROVED", "CANCELLED"):
+            r = _FakeRedis({"status": status})
+            outcome = finalize_completed(
+                r, key="job_status:1", default_stage="Completed", completed_argv=_COMPLETED_ARGV, context="UNIT"
+            )
+            self.assertEqual(outcome, ("SKIPPED", status))
+            self.assertEqual(r.status(), status)
+
+    # User value: ensures a failed job is never reported as completed.
+    def test_finalize_blocks_failed_job(self):
+        r = _FakeRedis({"status": "FAILED"})
+        outcome = finalize_completed(
+            r, key="job_status:1", default_stage="Completed", completed_argv=_COMPLETED_ARGV, context="UNIT"
+        )
+        self.assertEqual(outcome, ("BLOCKED", "FAILED"))
+        self.assertEqual(r.status(), "FAILED")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,247 @@
+# User value: This test keeps queued jobs safe across worker crashes and failed error handling.
+import unittest
+
+import redis
+
+from worker import worker_loop
+
+
+class _FakeListRedis:
+    # User value: supports __init__ so the OCR/transcription journey stays clear and reliable.
+    def __init__(self, lists=None, keys=()):
+        self.lists = {k: list(v) for k, v in (lists or {}).items()}
+        self.keys = set(keys)
+
+    # User value: supports scan_iter so the OCR/transcription journey stays clear and reliable.
+    def scan_iter(self, match="*", count=None):
+        prefix = match.rstrip("*")
+        return [k.encode() for k in list(self.lists) if k.startswith(prefix)]
+
+    # User value: supports exists so the OCR/transcription journey stays clear and reliable.
+    def exists(self, key):
+        return int(key in self.keys)
+
+    # User value: supports lpush so the OCR/transcription journey stays clear and reliable.
+    def lpush(self, key, *values):
+        for value in values:
+            self.lists.setdefault(key, []).insert(0, value)
+
+    # User value: supports rpush so the OCR/transcription journey stays clear and reliable.
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    # User value: supports lrem so the OCR/transcription journey stays clear and reliable.
+    def lrem(self, key, count, value):
+        items = self.lists.get(key, [])
+        if value in items:
+            items.remove(value)
+
+    # User value: supports lmove so the OCR/transcription journey stays clear and reliable.
+    def lmove(self, src, dst, wherefrom, whereto):
+        items = self.lists.get(src) or []
+        if not items:
+            return None
+        value = items.pop(0 if wherefrom == "LEFT" else -1)
+        if whereto == "LEFT":
+            self.lpush(dst, value)
+        else:
+            self.rpush(dst, value)
+        return value
+
+    # User value: supports pipeline so the OCR/transcription journey stays clear and reliable.
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    # User value: supports __init__ so the OCR/transcription journey stays clear and reliable.
+    def __init__(self, r):
+        self.r = r
+        self.calls = []
+
+    # User value: supports __getattr__ so the OCR/transcription journey stays clear and reliable.
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    # User value: supports execute so the OCR/transcription journey stays clear and reliable.
+    def execute(self):
+        return [getattr(self.r, name)(*args) for name, args in self.calls]
+
+
+# User value: builds a minimal job context for processing-list tests.
+def _ctx(queue="doc_jobs", job_raw=b'{"job_id": "unit-1"}'):
+    return worker_loop.JobCtx(
+        job={"job_id": "unit-1"},
+        job_raw=job_raw,
+        job_id="unit-1",
+        request_id="",
+        key="job_status:unit-1",
+        queue=queue,
+        active_dlq="doc_jobs_dead",
+        source_label="unit",
+        job_type="OCR",
+        current_attempt=0,
+        metric_labels=(),
+    )
+
+
+class ProcessingListUnitTests(unittest.TestCase):
+    # User value: supports setUp so the OCR/transcription journey stays clear and reliable.
+    def setUp(self):
+        self._originals = {
+            name: getattr(worker_loop, name)
+            for name in ("_run_job", "_handle_job_failure", "WORKER_PROCESSING_LIST")
+        }
+        worker_loop.WORKER_PROCESSING_LIST = True
+
+    # User value: supports tearDown so the OCR/transcription journey stays clear and reliable.
+    def tearDown(self):
+        for name, value in self._originals.items():
+            setattr(worker_loop, name, value)
+
+    # User value: ensures a finished job leaves the processing list so it is not run again.
+    def test_successful_job_is_acked(self):
+        ctx = _ctx()
+        r = _FakeListRedis({worker_loop.processing_list_key(ctx.queue): [ctx.job_raw]})
+        worker_loop._run_job = lambda r, ctx: None
+
+        worker_loop._process_job(r, ctx)
+
+        self.assertEqual(r.lists[worker_loop.processing_list_key(ctx.queue)], [])
+
+    # User value: ensures a job whose retry or DLQ write failed is kept for recovery instead of lost.
+    def test_unrecorded_failure_is_not_acked(self):
+        ctx = _ctx()
+        r = _FakeListRedis({worker_loop.processing_list_key(ctx.queue): [ctx.job_raw]})
+
+        # User value: simulates a job that fails during processing.
+        def _fail(r, ctx):
+            raise RuntimeError("boom")
+
+        worker_loop._run_job = _fail
+        worker_loop._handle_job_failure = lambda r, ctx, e: False
+
+        worker_loop._process_job(r, ctx)
+
+        self.assertEqual(r.lists[worker_loop.processing_list_key(ctx.queue)], [ctx.job_raw])
+
+    # User value: ensures a requeued job goes back to the front of its queue and leaves the processing list.
+    def test_requeue_moves_job_back(self):
+        ctx = _ctx()
+        key = worker_loop.processing_list_key(ctx.queue)
+        r = _FakeListRedis({key: [ctx.job_raw], ctx.queue: [b"older"]})
+
+        worker_loop.requeue_job(r, ctx.queue, ctx.job_raw)
+
+        self.assertEqual(r.lists[key], [])
+        self.assertEqual(r.lists[ctx.queue], [b"older", ctx.job_raw])
+
+    # User value: ensures recovered jobs run again in the order they were first popped.
+    def test_recovery_preserves_pop_order(self):
+        r = _FakeListRedis({"doc_jobs": [b"job-4", b"job-3"]})
+        for job_raw in (b"job-1", b"job-2"):
+            worker_loop._park_popped(r, b"doc_jobs", [job_raw])
+
+        self.assertEqual(worker_loop.recover_processing_lists(r, ["doc_jobs"]), 2)
+
+        self.assertEqual(r.lists[worker_loop.processing_list_key("doc_jobs")], [])
+        # The queue pops from the right: job-1 first, then job-2, then the rest.
+        self.assertEqual(r.lists["doc_jobs"], [b"job-4", b"job-3", b"job-2", b"job-1"])
+
+    # User value: ensures jobs parked by a redeployed worker under an old hostname are not stranded.
+    def test_orphaned_lists_are_recovered_only_without_live_owner(self):
+        r = _FakeListRedis(
+            {
+                "processing:old-host:doc_jobs": [b"a"],
+                "processing:live-host:doc_jobs": [b"b"],
+            },
+            keys={worker_loop.processing_owner_key("live-host")},
+        )
+
+        recovered = worker_loop.recover_orphaned_processing_lists(r, ["doc_jobs"])
+
+        self.assertEqual(recovered, 1)
+        self.assertEqual(r.lists["doc_jobs"], [b"a"])
+        self.assertEqual(r.lists["processing:live-host:doc_jobs"], [b"b"])
+
+    # User value: ensures a sibling process on the same host keeps its in-flight jobs while a dead one's are recovered.
+    def test_orphan_sweep_tells_processes_on_one_host_apart(self):
+        r = _FakeListRedis(
+            {
+                "processing:host-a:101:doc_jobs": [b"dead"],
+                "processing:host-a:102:doc_jobs": [b"live"],
+            },
+            keys={worker_loop.processing_owner_key("host-a:102")},
+        )
+
+        self.assertEqual(worker_loop.recover_orphaned_processing_lists(r, ["doc_jobs"]), 1)
+
+        self.assertEqual(r.lists["doc_jobs"], [b"dead"])
+        self.assertEqual(r.lists["processing:host-a:102:doc_jobs"], [b"live"])
+
+    # User value: ensures a payload with a malformed attempts field is dead-lettered instead of requeued forever.
+    def test_bad_attempts_goes_through_failure_path(self):
+        job_raw = b'{"job_id": "unit-1", "attempts": "abc"}'
+        key = worker_loop.processing_list_key("doc_jobs")
+        r = _FakeListRedis({key: [job_raw]})
+        failures = []
+        worker_loop._handle_job_failure = lambda r, ctx, e: failures.append((ctx, e)) or True
+        ctx = worker_loop._admission_ctx({"job_id": "unit-1", "attempts": "abc"}, job_raw, "doc_jobs")
+        try:
+            int(ctx.job["attempts"])
+        except ValueError as exc:
+            error = exc
+
+        worker_loop._handle_admission_error(r, r, ctx, error, admitted=False)
+
+        self.assertEqual(ctx.current_attempt, 0)
+        self.assertEqual(len(failures), 1)
+        self.assertIs(failures[0][1], error)
+        self.assertEqual(r.lists[key], [])
+        self.assertNotIn("doc_jobs", r.lists)
+
+    # User value: ensures a job hit by a Redis blip during admission goes back on its queue.
+    def test_transient_admission_error_requeues(self):
+        ctx = _ctx()
+        key = worker_loop.processing_list_key(ctx.queue)
+        r = _FakeListRedis({key: [ctx.job_raw]})
+        worker_loop._handle_job_failure = lambda r, ctx, e: self.fail("transient errors must not be dead-lettered")
+
+        worker_loop._handle_admission_error(r, r, ctx, redis.exceptions.ConnectionError("down"), admitted=False)
+
+        self.assertEqual(r.lists[key], [])
+        self.assertEqual(r.lists[ctx.queue], [ctx.job_raw])
+
+
+class _FakeCapacityRedis:
+    # User value: supports __init__ so the OCR/transcription journey stays clear and reliable.
+    def __init__(self, tokens, inflight):
+        self.tokens = list(tokens)
+        self.inflight = inflight
+
+    # User value: supports brpop so the OCR/transcription journey stays clear and reliable.
+    def brpop(self, keys, timeout=0):
+        return (keys[0], self.tokens.pop()) if self.tokens else None
+
+    # User value: supports scard so the OCR/transcription journey stays clear and reliable.
+    def scard(self, key):
+        return self.inflight
+
+
+class InflightCapacityUnitTests(unittest.TestCase):
+    # User value: ensures tokens left over from an idle period do not wake a worker while every slot is taken.
+    def test_stale_tokens_are_skipped_while_full(self):
+        r = _FakeCapacityRedis([b"old-1", b"old-2"], inflight=2)
+
+        self.assertFalse(worker_loop.wait_for_inflight_capacity(r, "OCR", 0.5, 2))
+        self.assertEqual(r.tokens, [])
+
+    # User value: ensures a released slot still wakes the waiting worker straight away.
+    def test_token_with_free_slot_wakes_waiter(self):
+        r = _FakeCapacityRedis([b"released"], inflight=1)
+
+        self.assertTrue(worker_loop.wait_for_inflight_capacity(r, "OCR", 0.5, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,9 @@
 # User value: This file helps users get reliable OCR/transcription results with clear processing behavior.
 import logging
-from datetime import datetime
-
 import redis
 
 from worker.status_machine import guarded_hset
+from worker.utils.clock import utc_now_iso
 
 logger = logging.getLogger("worker.adapters.status_store")
 
@@ -12,7 +11,7 @@ logger = logging.getLogger("worker.adapters.status_store")
 # User value: keeps users updated with live OCR/transcription progress.
 def update_status(redis_client: redis.Redis, job_id: str, *, context: str = "STATUS_STORE", **fields):
     key = f"job_status:{job_id}"
-    fields["updated_at"] = datetime.utcnow().isoformat()
+    fields["updated_at"] = utc_now_iso()
     ok, prev_status, _ = guarded_hset(redis_client, key=key, mapping=fields, context=context, request_id=str(fields.get("request_id") or ""))
     if not ok:
         logger.warning("status_store_blocked key=%s from=%s to=%s", key, prev_status, fields.get("status"))
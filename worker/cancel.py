@@ -1,6 +1,10 @@
 # User value: This file helps users get reliable OCR/transcription results with clear processing behavior.
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+
 import redis
 
 from worker.utils.retry_policy import REDIS_POLICY, run_with_retry
@@ -8,27 +12,105 @@ from worker.utils.retry_policy import REDIS_POLICY, run_with_retry
 
 logger = logging.getLogger("worker.cancel")
 
+CANCEL_CHANNEL_PREFIX = "cancel:"
+_CANCELLED_IDS_MAX = 10000
+_cancelled_ids: OrderedDict[str, None] = OrderedDict()
+_cancelled_lock = threading.Lock()
+_listener: threading.Thread | None = None
+_client: redis.Redis | None = None
+_client_lock = threading.Lock()
+
 
 class JobCancelledError(Exception):
     pass
 
 
+# User value: remembers cancel signals locally so running jobs stop without an extra Redis round trip.
+def note_cancelled(job_id: str) -> None:
+    if not job_id:
+        return
+    with _cancelled_lock:
+        _cancelled_ids[job_id] = None
+        _cancelled_ids.move_to_end(job_id)
+        while len(_cancelled_ids) > _CANCELLED_IDS_MAX:
+            _cancelled_ids.popitem(last=False)
+
+
+# User value: lets users stop running OCR/transcription jobs quickly.
+def cancelled_locally(job_id: str) -> bool:
+    return job_id in _cancelled_ids
+
+
+# User value: listens for cancel:<job_id> messages so cancellation reaches this worker within a second.
+def _listen_for_cancellations(r: redis.Redis) -> None:
+    while True:
+        pubsub = None
+        try:
+            pubsub = r.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(f"{CANCEL_CHANNEL_PREFIX}*")
+            logger.info("cancel_listener_subscribed pattern=%s*", CANCEL_CHANNEL_PREFIX)
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                if not message or message.get("type") != "pmessage":
+                    continue
+                channel = message.get("channel") or ""
+                if isinstance(channel, bytes):
+                    channel = channel.decode("utf-8", "replace")
+                job_id = channel[len(CANCEL_CHANNEL_PREFIX):]
+                note_cancelled(job_id)
+                logger.info("cancel_signal_received job_id=%s", job_id)
+        except Exception as exc:
+            logger.warning("cancel_listener_error action=resubscribe error=%s", exc)
+            time.sleep(2)
+        finally:
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+# User value: starts the background cancel listener once per process.
+def start_cancel_listener(r: redis.Redis) -> threading.Thread:
+    global _listener
+    with _cancelled_lock:
+        if _listener is None:
+            _listener = threading.Thread(
+                target=_listen_for_cancellations,
+                args=(r,),
+                name="cancel-listener",
+                daemon=True,
+            )
+            _listener.start()
+    return _listener
+
+
+# Built once per process; callers without their own client share its pool
+# instead of opening a new connection for every cancel check.
 # User value: supports _redis_client so the OCR/transcription journey stays clear and reliable.
 def _redis_client() -> redis.Redis:
-    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-    return redis.Redis.from_url(
-        redis_url,
-        decode_responses=True,
-        socket_keepalive=True,
-        socket_connect_timeout=2,
-        socket_timeout=10,
-        retry_on_timeout=True,
-        health_check_interval=15,
-    )
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+                _client = redis.Redis.from_url(
+                    redis_url,
+                    decode_responses=True,
+                    socket_keepalive=True,
+                    socket_connect_timeout=2,
+                    socket_timeout=10,
+                    retry_on_timeout=True,
+                    health_check_interval=15,
+                )
+    return _client
 
 
 # User value: lets users stop running OCR/transcription jobs quickly.
 def is_cancelled(job_id: str, r: redis.Redis | None = None, retries: int = 2) -> bool:
+    if cancelled_locally(job_id):
+        return True
+
     # Backward-compatible parameter: if explicit retries provided, override policy.
     policy = REDIS_POLICY
     if retries != REDIS_POLICY.max_retries:
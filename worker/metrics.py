@@ -1,6 +1,9 @@
 # User value: This file helps users get reliable OCR/transcription results with clear processing behavior.
+import atexit
 import logging
+import os
 import threading
+import time
 from copy import deepcopy
 
 logger = logging.getLogger("worker.metrics")
@@ -9,6 +12,18 @@ _LOCK = threading.Lock()
 _COUNTERS: dict[str, int] = {}
 _TIMERS: dict[str, dict[str, float]] = {}
 
+# Metric log records are aggregated in-process and emitted once per interval.
+# Set METRICS_FLUSH_INTERVAL_SEC=0 to log every update synchronously.
+try:
+    METRICS_FLUSH_INTERVAL_SEC = max(0.0, float(os.getenv("METRICS_FLUSH_INTERVAL_SEC", "1.0")))
+except ValueError:
+    METRICS_FLUSH_INTERVAL_SEC = 1.0
+
+_PENDING_COUNTERS: dict[str, int] = {}
+_PENDING_TIMERS: dict[str, dict[str, float]] = {}
+_flusher: threading.Thread | None = None
+_LABELLED_NAMES: dict[tuple[str, tuple[tuple[str, str], ...]], str] = {}
+
 
 # User value: supports _tagged_name so the OCR/transcription journey stays clear and reliable.
 def _tagged_name(name: str, tags: dict[str, str]) -> str:
@@ -20,21 +35,82 @@ def _tagged_name(name: str, tags: dict[str, str]) -> str:
     return f"{name}|{'|'.join(parts)}"
 
 
-# User value: supports incr so the OCR/transcription journey stays clear and reliable.
-def incr(name: str, amount: int = 1, **tags) -> None:
-    metric = _tagged_name(name, {k: str(v) for k, v in tags.items()})
+# User value: resolves a metric name for prebuilt label pairs once and reuses it on later jobs.
+def _labelled_name(name: str, labels: tuple[tuple[str, str], ...]) -> str:
+    key = (name, labels)
+    metric = _LABELLED_NAMES.get(key)
+    if metric is None:
+        metric = _tagged_name(name, {k: str(v) for k, v in labels})
+        _LABELLED_NAMES[key] = metric
+    return metric
+
+
+# User value: keeps metric logging off the job hot path by emitting aggregated records in the background.
+def _ensure_flusher() -> None:
+    global _flusher
+    if _flusher is not None:
+        return
     with _LOCK:
-        _COUNTERS[metric] = int(_COUNTERS.get(metric, 0)) + int(amount)
-        total = _COUNTERS[metric]
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(target=_flush_forever, name="metrics-flusher", daemon=True)
+        _flusher.start()
+
+
+# User value: supports _flush_forever so the OCR/transcription journey stays clear and reliable.
+def _flush_forever() -> None:
+    while True:
+        time.sleep(max(0.05, METRICS_FLUSH_INTERVAL_SEC))
+        try:
+            flush()
+        except Exception:
+            logger.exception("metric_flush_failed")
+
+
+# User value: supports _log_counter so the OCR/transcription journey stays clear and reliable.
+def _log_counter(metric: str, delta: int, total: int) -> None:
     logger.info(
         "metric_counter_update",
-        extra={"metric_name": metric, "metric_type": "counter", "delta": amount, "total": total},
+        extra={"metric_name": metric, "metric_type": "counter", "delta": delta, "total": total},
     )
 
 
+# User value: supports incr so the OCR/transcription journey stays clear and reliable.
+def incr(name: str, amount: int = 1, **tags) -> None:
+    _incr_metric(_tagged_name(name, {k: str(v) for k, v in tags.items()}), amount)
+
+
+# User value: counts hot-path events with prebuilt label pairs, skipping per-call tag formatting.
+def incr_labels(name: str, labels: tuple[tuple[str, str], ...], amount: int = 1) -> None:
+    _incr_metric(_labelled_name(name, labels), amount)
+
+
+# User value: supports _incr_metric so the OCR/transcription journey stays clear and reliable.
+def _incr_metric(metric: str, amount: int) -> None:
+    amount = int(amount)
+    with _LOCK:
+        total = int(_COUNTERS.get(metric, 0)) + amount
+        _COUNTERS[metric] = total
+        if METRICS_FLUSH_INTERVAL_SEC > 0:
+            _PENDING_COUNTERS[metric] = _PENDING_COUNTERS.get(metric, 0) + amount
+    if METRICS_FLUSH_INTERVAL_SEC > 0:
+        _ensure_flusher()
+        return
+    _log_counter(metric, amount, total)
+
+
 # User value: supports observe_ms so the OCR/transcription journey stays clear and reliable.
 def observe_ms(name: str, duration_ms: float, **tags) -> None:
-    metric = _tagged_name(name, {k: str(v) for k, v in tags.items()})
+    _observe_metric(_tagged_name(name, {k: str(v) for k, v in tags.items()}), duration_ms)
+
+
+# User value: records hot-path latencies with prebuilt label pairs, skipping per-call tag formatting.
+def observe_ms_labels(name: str, duration_ms: float, labels: tuple[tuple[str, str], ...]) -> None:
+    _observe_metric(_labelled_name(name, labels), duration_ms)
+
+
+# User value: supports _observe_metric so the OCR/transcription journey stays clear and reliable.
+def _observe_metric(metric: str, duration_ms: float) -> None:
     value = float(max(0.0, duration_ms))
     with _LOCK:
         current = _TIMERS.get(metric)
@@ -45,15 +121,53 @@ def observe_ms(name: str, duration_ms: float, **tags) -> None:
             current["sum_ms"] += value
             current["min_ms"] = min(current["min_ms"], value)
             current["max_ms"] = max(current["max_ms"], value)
+        if METRICS_FLUSH_INTERVAL_SEC > 0:
+            pending = _PENDING_TIMERS.get(metric)
+            if not pending:
+                _PENDING_TIMERS[metric] = {"count": 1.0, "sum_ms": value, "max_ms": value}
+            else:
+                pending["count"] += 1.0
+                pending["sum_ms"] += value
+                pending["max_ms"] = max(pending["max_ms"], value)
+    if METRICS_FLUSH_INTERVAL_SEC > 0:
+        _ensure_flusher()
+        return
     logger.info(
         "metric_timer_observe",
         extra={"metric_name": metric, "metric_type": "timer_ms", "value_ms": round(value, 3)},
     )
 
 
+# User value: emits buffered metric updates so dashboards stay current without per-job log cost.
+def flush() -> None:
+    with _LOCK:
+        counters = [(metric, delta, int(_COUNTERS.get(metric, 0))) for metric, delta in _PENDING_COUNTERS.items()]
+        timers = list(_PENDING_TIMERS.items())
+        _PENDING_COUNTERS.clear()
+        _PENDING_TIMERS.clear()
+    for metric, delta, total in counters:
+        _log_counter(metric, delta, total)
+    for metric, pending in timers:
+        count = int(pending["count"])
+        extra = {
+            "metric_name": metric,
+            "metric_type": "timer_ms",
+            "mean_ms": round(pending["sum_ms"] / max(1, count), 3),
+            "max_ms": round(pending["max_ms"], 3),
+            "count": count,
+        }
+        # value_ms keeps meaning a single observation, as in unbatched mode.
+        if count == 1:
+            extra["value_ms"] = round(pending["sum_ms"], 3)
+        logger.info("metric_timer_observe", extra=extra)
+
+
 # User value: supports snapshot so the OCR/transcription journey stays clear and reliable.
 def snapshot() -> dict:
     with _LOCK:
         counters = deepcopy(_COUNTERS)
         timers = deepcopy(_TIMERS)
     return {"counters": counters, "timers_ms": timers}
+
+
+atexit.register(flush)
@@ -10,11 +10,12 @@ import math
 import json
 import logging
 import os
+import queue
 import re
 import sys
+import threading
 import time
-import unicodedata
-from datetime import datetime
+from contextlib import closing
 from typing import List
 
 import redis
@@ -32,9 +33,14 @@ from vertexai.preview.generative_models import (
 
 from worker.cancel import ensure_not_cancelled
 from worker.contract import CONTRACT_VERSION
-from worker.utils.gcs import download_from_gcs, upload_text
+from worker.utils.gcs import downloaded_input, upload_text
 from worker.status_machine import guarded_hset
+from worker.utils.filenames import normalize_output_filename
+from worker.utils.prompts import load_named_prompt
+from worker.utils.redis_safe import redis_retryable
 from worker.utils.retry_policy import REDIS_POLICY, run_with_retry
+from worker.utils.clock import utc_now_iso
+from worker.utils.progress import progress_due
 from worker.quality.ocr_quality import score_page, summarize_document_quality
 
 # =========================================================
@@ -84,8 +90,15 @@ GEMINI_PREFLIGHT_PROBE = _env_int("GEMINI_PREFLIGHT_PROBE", 0)
 GEMINI_429_COOLDOWN_SEC = _env_int_alias("GEMINI_429_COOLDOWN_SEC", "OCR_429_COOLDOWN_SEC", 60)
 GEMINI_429_COOLDOWN_LOG_INTERVAL_SEC = _env_int_alias("GEMINI_429_COOLDOWN_LOG_INTERVAL_SEC", "OCR_429_COOLDOWN_LOG_INTERVAL_SEC", 10)
 GEMINI_429_MAX_COOLDOWNS_PER_PAGE = _env_int_alias("GEMINI_429_MAX_COOLDOWNS_PER_PAGE", "OCR_429_MAX_COOLDOWNS_PER_PAGE", 30)
+# Number of rendered page chunks kept ready ahead of Gemini OCR (0 = render inline).
+OCR_RENDER_PREFETCH = _env_int("OCR_RENDER_PREFETCH", 1)
 OCR_ALLOW_EMPTY_PAGE_FALLBACK = str(os.getenv("OCR_ALLOW_EMPTY_PAGE_FALLBACK", "1")).strip().lower() not in ("0", "false", "no")
 
+_JSON_FENCE_OPEN_RE = re.compile(r"^```(?:json)?\s*", re.IGNORECASE)
+_JSON_FENCE_CLOSE_RE = re.compile(r"\s*```$")
+_PAGE_BLOCK_RE = re.compile(r"<<<PAGE:(\d+)>>>\s*([\s\S]*?)(?=<<<PAGE:\d+>>>|$)")
+_END_PAGE_RE = re.compile(r"\s*<<<END_PAGE>>>\s*$")
+
 if not PROJECT_ID:
     raise RuntimeError("GCP_PROJECT_ID not set")
 if OCR_DPI < 72:
@@ -110,7 +123,17 @@ if GEMINI_429_MAX_COOLDOWNS_PER_PAGE < 1:
 # =========================================================
 # REDIS
 # =========================================================
-r = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+# Shared by the page cache and status writes; the pool drops broken
+# sockets and health_check_interval re-validates idle ones.
+r = redis.Redis.from_url(
+    REDIS_URL,
+    decode_responses=True,
+    socket_keepalive=True,
+    socket_connect_timeout=2,
+    socket_timeout=10,
+    retry_on_timeout=True,
+    health_check_interval=15,
+)
 
 # =========================================================
 # INIT VERTEX AI
@@ -126,7 +149,7 @@ logger = logging.getLogger("worker.ocr")
 
 # User value: supports log so the OCR/transcription journey stays clear and reliable.
 def log(msg: str):
-    logger.info("[OCR %s] %s", datetime.utcnow().isoformat(), msg)
+    logger.info("[OCR %s] %s", utc_now_iso(), msg)
 
 
 class PageRateLimitExceeded(RuntimeError):
@@ -220,27 +243,6 @@ Rules (STRICT):
 """
 
 
-# User value: loads latest OCR/transcription data so users see current status.
-def load_named_prompt(prompt_file: str, prompt_name: str) -> str:
-    with open(prompt_file, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    variants = [prompt_name, f"{prompt_name}_PROMPT"] if not str(prompt_name).endswith("_PROMPT") else [prompt_name]
-    start = ""
-    for name in variants:
-        for prefix in ("### PROMPT: ", "### "):
-            marker = f"{prefix}{name}"
-            if marker in content:
-                start = marker
-                break
-        if start:
-            break
-    end = "=== END PROMPT ==="
-    if not start:
-        raise RuntimeError(f"Prompt '{prompt_name}' not found")
-    return content.split(start, 1)[1].split(end, 1)[0].strip()
-
-
 # User value: maps user-selected PDF type to deterministic OCR prompt behavior.
 def resolve_ocr_prompt(job: dict, page_num: int) -> str:
     subtype = str(job.get("content_subtype") or "").strip().lower()
@@ -281,42 +283,13 @@ def pil_to_png_bytes(image: Image.Image) -> bytes:
     return buf.getvalue()
 
 
-# User value: supports sanitize_filename so the OCR/transcription journey stays clear and reliable.
-def sanitize_filename(name: str, max_len: int = 180) -> str:
-    name = unicodedata.normalize("NFKC", name)
-    name = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")
-    if not name:
-        name = "transcript"
-    return name[:max_len]
-
-
-# User value: normalizes data so users see consistent OCR/transcription results.
-def normalize_output_filename(raw_name: str | None) -> str:
-    stem, _ = os.path.splitext(raw_name or "transcript")
-    return f"{sanitize_filename(stem)}.txt"
-
-
 def ocr_pages_cache_key(job_id: str) -> str:
     return f"job_ocr_pages:{job_id}"
 
 
-def _redis_retryable(op: str, target: str, fn):
-    def _on_retry(attempt: int, exc: BaseException) -> None:
-        logger.warning("ocr_redis_retry op=%s target=%s attempt=%s/%s error=%s", op, target, attempt, REDIS_POLICY.max_retries, exc)
-
-    return run_with_retry(
-        operation=op,
-        target=target,
-        fn=fn,
-        retryable=(redis.exceptions.ConnectionError, redis.exceptions.TimeoutError),
-        policy=REDIS_POLICY,
-        on_retry=_on_retry,
-    )
-
-
 def load_cached_page_texts(job_id: str) -> dict[int, str]:
     key = ocr_pages_cache_key(job_id)
-    raw = _redis_retryable("redis_hgetall", key, lambda: r.hgetall(key) or {})
+    raw = redis_retryable("redis_hgetall", key, lambda: r.hgetall(key) or {})
     out: dict[int, str] = {}
     for k, v in raw.items():
         try:
@@ -329,12 +302,12 @@ def load_cached_page_texts(job_id: str) -> dict[int, str]:
 
 def cache_page_text(job_id: str, page_num: int, text: str) -> None:
     key = ocr_pages_cache_key(job_id)
-    _redis_retryable("redis_hset", f"{key}:{page_num}", lambda: r.hset(key, str(page_num), text))
+    redis_retryable("redis_hset", f"{key}:{page_num}", lambda: r.hset(key, str(page_num), text))
 
 
 def clear_cached_page_texts(job_id: str) -> None:
     key = ocr_pages_cache_key(job_id)
-    _redis_retryable("redis_delete", key, lambda: r.delete(key))
+    redis_retryable("redis_delete", key, lambda: r.delete(key))
 
 
 def ocr_failed_pages_cache_key(job_id: str) -> str:
@@ -343,7 +316,7 @@ def ocr_failed_pages_cache_key(job_id: str) -> str:
 
 def load_cached_failed_pages(job_id: str) -> set[int]:
     key = ocr_failed_pages_cache_key(job_id)
-    raw_members = _redis_retryable("redis_smembers", key, lambda: r.smembers(key) or set())
+    raw_members = redis_retryable("redis_smembers", key, lambda: r.smembers(key) or set())
     out: set[int] = set()
     for raw in raw_members:
         try:
@@ -355,12 +328,12 @@ def load_cached_failed_pages(job_id: str) -> set[int]:
 
 def cache_failed_page(job_id: str, page_num: int) -> None:
     key = ocr_failed_pages_cache_key(job_id)
-    _redis_retryable("redis_sadd", f"{key}:{page_num}", lambda: r.sadd(key, str(page_num)))
+    redis_retryable("redis_sadd", f"{key}:{page_num}", lambda: r.sadd(key, str(page_num)))
 
 
 def clear_cached_failed_pages(job_id: str) -> None:
     key = ocr_failed_pages_cache_key(job_id)
-    _redis_retryable("redis_delete", key, lambda: r.delete(key))
+    redis_retryable("redis_delete", key, lambda: r.delete(key))
 
 
 def _is_gemini_rate_limited(exc: BaseException) -> bool:
@@ -399,8 +372,8 @@ def _wait_for_429_cooldown(*, page_num: int, cooldown_no: int, wait_sec: int) ->
 def _extract_json_object(text: str) -> str:
     raw = str(text or "").strip()
     if raw.startswith("```"):
-        raw = re.sub(r"^```(?:json)?\s*", "", raw, flags=re.IGNORECASE)
-        raw = re.sub(r"\s*```$", "", raw)
+        raw = _JSON_FENCE_OPEN_RE.sub("", raw)
+        raw = _JSON_FENCE_CLOSE_RE.sub("", raw)
     start = raw.find("{")
     end = raw.rfind("}")
     if start == -1 or end == -1 or end <= start:
@@ -411,12 +384,11 @@ def _extract_json_object(text: str) -> str:
 def _parse_batch_marker_output(raw_text: str, expected_pages: list[int]) -> dict[int, str]:
     text = str(raw_text or "").strip()
     # Match each PAGE block; allow multiline OCR text.
-    pattern = re.compile(r"<<<PAGE:(\d+)>>>\s*([\s\S]*?)(?=<<<PAGE:\d+>>>|$)")
     out: dict[int, str] = {}
-    for match in pattern.finditer(text):
+    for match in _PAGE_BLOCK_RE.finditer(text):
         page_num = int(match.group(1))
         body = match.group(2)
-        body = re.sub(r"\s*<<<END_PAGE>>>\s*$", "", body).strip()
+        body = _END_PAGE_RE.sub("", body).strip()
         if page_num in expected_pages:
             out[page_num] = body
     missing = [p for p in expected_pages if p not in out]
@@ -450,6 +422,54 @@ def iter_pdf_pages(input_path: str):
         yield first_page, pages, total_pages
 
 
+# User value: renders upcoming PDF chunks in the background so Gemini OCR never waits on pdftoppm.
+def prefetch_pdf_pages(input_path: str, depth: int = OCR_RENDER_PREFETCH):
+    if depth <= 0 or OCR_PAGE_BATCH_SIZE <= 0:
+        yield from iter_pdf_pages(input_path)
+        return
+
+    # The renderer takes a slot before rendering and the consumer frees it
+    # when it moves on to the next chunk, so at most `depth` chunks exist
+    # beyond the one being OCRed. Each chunk holds OCR_PAGE_BATCH_SIZE
+    # decoded pages (about 25MB per A4 page at 300 DPI).
+    ready: queue.Queue = queue.Queue()
+    slots = threading.Semaphore(depth)
+    stop = threading.Event()
+    done = object()
+
+    def _take_slot() -> bool:
+        while not stop.is_set():
+            if slots.acquire(timeout=0.5):
+                return True
+        return False
+
+    def _render():
+        try:
+            pages = iter_pdf_pages(input_path)
+            while _take_slot():
+                item = next(pages, done)
+                ready.put(item)
+                if item is done:
+                    return
+        except BaseException as exc:
+            ready.put(exc)
+
+    renderer = threading.Thread(target=_render, name="ocr-render", daemon=True)
+    renderer.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            slots.release()
+            yield item
+            del item
+    finally:
+        stop.set()
+
+
 # User value: supports safe_hset so the OCR/transcription journey stays clear and reliable.
 def safe_hset(key: str, mapping: dict, retries: int = 1):
     policy = REDIS_POLICY
@@ -464,17 +484,8 @@ def safe_hset(key: str, mapping: dict, retries: int = 1):
 
     # User value: supports _write_once so the OCR/transcription journey stays clear and reliable.
     def _write_once():
-        rc = redis.Redis.from_url(
-            REDIS_URL,
-            decode_responses=True,
-            socket_keepalive=True,
-            socket_connect_timeout=2,
-            socket_timeout=10,
-            retry_on_timeout=True,
-            health_check_interval=15,
-        )
         ok, current_status, _ = guarded_hset(
-            rc,
+            r,
             key=key,
             mapping=mapping,
             context="OCR_SAFE_HSET",
@@ -507,7 +518,7 @@ def update(job_id: str, *, stage: str, progress: int, status: str = "PROCESSING"
             "stage": stage,
             "progress": progress,
             "eta_sec": eta_sec,
-            "updated_at": datetime.utcnow().isoformat(),
+            "updated_at": utc_now_iso(),
         },
     )
 
@@ -801,15 +812,30 @@ def gemini_ocr_batch_with_retries(page_items: list[tuple[int, Image.Image]], job
 def run_ocr(job_id: str, job: dict) -> dict:
     ensure_not_cancelled(job_id, r=r)
     input_path = job.get("input_path")
-    if not input_path:
-        input_gcs_uri = job.get("input_gcs_uri")
-        if not input_gcs_uri:
-            raise RuntimeError("input_path or input_gcs_uri missing in OCR job")
-        input_path = download_from_gcs(input_gcs_uri)
+    if input_path:
+        return _run_ocr_on_input(job_id, job, input_path)
+
+    input_gcs_uri = job.get("input_gcs_uri")
+    if not input_gcs_uri:
+        raise RuntimeError("input_path or input_gcs_uri missing in OCR job")
+    with downloaded_input(input_gcs_uri) as input_path:
+        return _run_ocr_on_input(job_id, job, input_path)
+
 
+# The page iterator is closed explicitly so the background renderer stops
+# as soon as the job fails or is cancelled, not when the generator is
+# garbage-collected.
+# User value: supports _run_ocr_on_input so the OCR/transcription journey stays clear and reliable.
+def _run_ocr_on_input(job_id: str, job: dict, input_path: str) -> dict:
     if not os.path.exists(input_path):
         raise FileNotFoundError(input_path)
 
+    with closing(prefetch_pdf_pages(input_path)) as rendered:
+        return _ocr_rendered_pages(job_id, job, rendered)
+
+
+# User value: OCRs each rendered page chunk and publishes the finished document.
+def _ocr_rendered_pages(job_id: str, job: dict, rendered) -> dict:
     log(f"Starting OCR job_id={job_id}")
     ensure_not_cancelled(job_id, r=r)
     update(job_id, stage="Loading PDF", progress=5, eta_sec=120)
@@ -835,7 +861,7 @@ def run_ocr(job_id: str, job: dict) -> dict:
             f"cached_pages={len(cached_pages)} job_id={job_id}"
         )
 
-    for batch_first_page, pages, batch_total_pages in iter_pdf_pages(input_path):
+    for batch_first_page, pages, batch_total_pages in rendered:
         if total_pages == 0:
             total_pages = batch_total_pages
             log(f"PDF pages detected: {total_pages}")
@@ -1014,11 +1040,12 @@ def run_ocr(job_id: str, job: dict) -> dict:
             processed_pages += 1
 
             ensure_not_cancelled(job_id, r=r)
-            update(
-                job_id,
-                stage=f"OCR page {idx}/{total_pages}",
-                progress=10 + int((idx / total_pages) * 80),
-            )
+            if progress_due(job_id, force=idx == total_pages):
+                update(
+                    job_id,
+                    stage=f"OCR page {idx}/{total_pages}",
+                    progress=10 + int((idx / total_pages) * 80),
+                )
 
             if idx in cached_pages:
                 text = cached_pages[idx]
@@ -1098,7 +1125,7 @@ def run_ocr(job_id: str, job: dict) -> dict:
             "error_message": "",
             "error_detail": "",
             "error": "",
-            "updated_at": datetime.utcnow().isoformat(),
+            "updated_at": utc_now_iso(),
         },
     )
 
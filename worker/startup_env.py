@@ -89,8 +89,11 @@ def validate_startup_env() -> None:
     _validate_redis_url(os.getenv("REDIS_URL"), "REDIS_URL", errors)
 
     _validate_int_range("TRANSCRIBE_CHUNK_DURATION_SEC", errors, min_value=30, max_value=3600)
+    _validate_int_range("TRANSCRIBE_CHUNK_CONCURRENCY", errors, min_value=1, max_value=16)
     _validate_int_range("OCR_DPI", errors, min_value=72, max_value=600)
     _validate_int_range("OCR_PAGE_BATCH_SIZE", errors, min_value=0, max_value=500)
+    _validate_int_range("OCR_RENDER_PREFETCH", errors, min_value=0, max_value=4)
+    _validate_int_range("GCS_PARALLEL_DOWNLOAD_MIN_MB", errors, min_value=32, max_value=5120)
 
     queue_mode = (os.getenv("QUEUE_MODE", "single") or "single").strip().lower()
     if queue_mode not in {"single", "both", "partitioned"}:
@@ -110,6 +113,9 @@ def validate_startup_env() -> None:
 
     _validate_int_range("WORKER_MAX_INFLIGHT_OCR", errors, min_value=0, max_value=100)
     _validate_int_range("WORKER_MAX_INFLIGHT_TRANSCRIPTION", errors, min_value=0, max_value=100)
+    _validate_int_range("WORKER_CONCURRENCY", errors, min_value=0, max_value=100)
+    _validate_int_range("WORKER_PREFETCH_COUNT", errors, min_value=1, max_value=100)
+    _validate_int_range("WORKER_HEALTH_LOG_INTERVAL_SEC", errors, min_value=0, max_value=3600)
     _validate_choice_env(
         "WORKER_SCHEDULER_POLICY",
         errors,
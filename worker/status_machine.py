@@ -2,7 +2,8 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional
+import threading
+from typing import Optional, Sequence
 
 from worker.contract import (
     JOB_STATUS_QUEUED,
@@ -14,6 +15,11 @@ from worker.contract import (
 
 logger = logging.getLogger("worker.status_machine")
 
+# Default for current_status: read the hash before writing. Callers that
+# already hold the status (including None for a missing hash) pass it in
+# to save the HGETALL round trip.
+_FETCH_CURRENT = object()
+
 _ALLOWED = {
     None: {
         JOB_STATUS_QUEUED,
@@ -59,15 +65,29 @@ def is_allowed_transition(current: Optional[str], target: Optional[str]) -> bool
     return target_n in allowed
 
 
+# User value: reads the stored status only when the caller has not already fetched it.
+def _current_status(r, key: str, current_status) -> Optional[str]:
+    if current_status is _FETCH_CURRENT:
+        current_status = (r.hgetall(key) or {}).get("status")
+    return _norm(current_status)
+
+
 # User value: supports guarded_hset so the OCR/transcription journey stays clear and reliable.
-def guarded_hset(r, *, key: str, mapping: dict, context: str, request_id: str = "") -> tuple[bool, Optional[str], Optional[str]]:
+def guarded_hset(
+    r,
+    *,
+    key: str,
+    mapping: dict,
+    context: str,
+    request_id: str = "",
+    current_status=_FETCH_CURRENT,
+) -> tuple[bool, Optional[str], Optional[str]]:
     target = _norm(mapping.get("status"))
     if not target:
         r.hset(key, mapping=mapping)
         return True, None, None
 
-    current_data = r.hgetall(key) or {}
-    current = _norm(current_data.get("status"))
+    current = _current_status(r, key, current_status)
 
     if not is_allowed_transition(current, target):
         logger.warning(
@@ -82,3 +102,114 @@ def guarded_hset(r, *, key: str, mapping: dict, context: str, request_id: str =
 
     r.hset(key, mapping=mapping)
     return True, current, target
+
+
+# =========================================================
+# ATOMIC CLAIM / FINALIZE
+# =========================================================
+# User value: lists the stored statuses a job may not move to target from, so the Lua guards match _ALLOWED.
+def _lua_blocked_set(target: str) -> str:
+    blocked = sorted(s for s, allowed in _ALLOWED.items() if s is not None and target not in allowed)
+    return "{" + ", ".join(f"[{b!r}] = true" for b in blocked) + "}"
+
+
+_LUA_NORM = """
+local raw = redis.call('HGET', KEYS[1], 'status')
+local s = ''
+if raw then s = string.upper(string.match(raw, '^%s*(.-)%s*$')) end
+"""
+
+# ARGV[1] = number of CANCELLED field/value items that follow; the remaining
+# items are the PROCESSING fields. Returns {outcome, stored status}.
+CLAIM_LUA = (
+    _LUA_NORM
+    + f"""
+local n = tonumber(ARGV[1])
+if redis.call('HGET', KEYS[1], 'cancel_requested') == '1' or s == '{JOB_STATUS_CANCELLED}' then
+  if ({_lua_blocked_set(JOB_STATUS_CANCELLED)})[s] then return {{'BLOCKED_CANCELLED', s}} end
+  redis.call('HSET', KEYS[1], unpack(ARGV, 2, n + 1))
+  return {{'CANCELLED', s}}
+end
+if ({_lua_blocked_set(JOB_STATUS_PROCESSING)})[s] then return {{'BLOCKED', s}} end
+redis.call('HSET', KEYS[1], unpack(ARGV, n + 2, #ARGV))
+return {{'PROCESSING', s}}
+"""
+)
+
+# ARGV[1] = stage to use when the hash has none; the remaining items are the
+# COMPLETED fields. Jobs parked for approval or already cancelled are left alone.
+FINALIZE_LUA = (
+    _LUA_NORM
+    + f"""
+if s == 'WAITING_APPROVAL' or s == 'APPROVED' or s == '{JOB_STATUS_CANCELLED}' then return {{'SKIPPED', s}} end
+if ({_lua_blocked_set(JOB_STATUS_COMPLETED)})[s] then return {{'BLOCKED', s}} end
+local stage = redis.call('HGET', KEYS[1], 'stage')
+if not stage or stage == '' then stage = ARGV[1] end
+redis.call('HSET', KEYS[1], 'stage', stage, unpack(ARGV, 2, #ARGV))
+return {{'COMPLETED', s}}
+"""
+)
+
+_SCRIPTS: dict[str, object] = {}
+_SCRIPTS_LOCK = threading.Lock()
+
+
+# User value: runs a status script by SHA (loading it once per server) so each job pays a single round trip.
+def _run_script(r, source: str, key: str, args: Sequence) -> tuple[str, Optional[str]]:
+    script = _SCRIPTS.get(source)
+    if script is None:
+        with _SCRIPTS_LOCK:
+            script = _SCRIPTS.get(source)
+            if script is None:
+                script = r.register_script(source)
+                _SCRIPTS[source] = script
+    outcome, stored = script(keys=[key], args=args, client=r)
+    if isinstance(outcome, bytes):
+        outcome, stored = outcome.decode(), stored.decode()
+    return outcome, stored or None
+
+
+# User value: atomically skips cancelled jobs or marks them PROCESSING, closing the cancel/start race.
+def claim_for_processing(
+    r,
+    *,
+    key: str,
+    cancelled_argv: Sequence,
+    processing_argv: Sequence,
+    context: str,
+    request_id: str = "",
+) -> tuple[str, Optional[str]]:
+    outcome, current = _run_script(r, CLAIM_LUA, key, (len(cancelled_argv), *cancelled_argv, *processing_argv))
+    if outcome.startswith("BLOCKED"):
+        logger.warning(
+            "status_transition_blocked context=%s key=%s current=%s target=%s request_id=%s",
+            context,
+            key,
+            current,
+            JOB_STATUS_CANCELLED if outcome == "BLOCKED_CANCELLED" else JOB_STATUS_PROCESSING,
+            request_id,
+        )
+    return outcome, current
+
+
+# User value: atomically marks a finished job COMPLETED unless it is awaiting approval or was cancelled.
+def finalize_completed(
+    r,
+    *,
+    key: str,
+    default_stage: str,
+    completed_argv: Sequence,
+    context: str,
+    request_id: str = "",
+) -> tuple[str, Optional[str]]:
+    outcome, current = _run_script(r, FINALIZE_LUA, key, (default_stage, *completed_argv))
+    if outcome == "BLOCKED":
+        logger.warning(
+            "status_transition_blocked context=%s key=%s current=%s target=%s request_id=%s",
+            context,
+            key,
+            current,
+            JOB_STATUS_COMPLETED,
+            request_id,
+        )
+    return outcome, current
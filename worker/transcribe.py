@@ -12,12 +12,14 @@ REDIS SAFE (RECONNECT ON STALE CONNECTION)
 import logging
 import os
 import sys
-import re
 import time
 import json
-import unicodedata
 import hashlib
-from datetime import datetime
+import io
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from typing import List
 
 import redis
@@ -27,12 +29,17 @@ from pydub import AudioSegment
 from google.cloud import aiplatform
 from vertexai.preview.generative_models import GenerativeModel, Part
 
-from worker.cancel import ensure_not_cancelled
+from worker.cancel import JobCancelledError, cancelled_locally, ensure_not_cancelled, note_cancelled
 from worker.contract import CONTRACT_VERSION
 from worker.quality.transcription_quality import score_segment, summarize_segments
-from worker.utils.gcs import upload_text, download_from_gcs
+from worker.utils.gcs import downloaded_input, upload_text
 from worker.status_machine import guarded_hset
+from worker.utils.filenames import normalize_output_filename
+from worker.utils.prompts import load_named_prompt
+from worker.utils.redis_safe import get_redis, redis_retryable
 from worker.utils.retry_policy import REDIS_POLICY, run_with_retry
+from worker.utils.clock import utc_now_iso
+from worker.utils.progress import progress_due
 
 # =========================================================
 # UTF-8 SAFE OUTPUT
@@ -54,8 +61,6 @@ MODEL_NAME = "gemini-2.5-flash"
 PROMPT_FILE = os.getenv("PROMPT_FILE")
 PROMPT_NAME = os.getenv("PROMPT_NAME")
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-
 
 # User value: supports _env_int so the OCR/transcription journey stays clear and reliable.
 def _env_int(name: str, default: int) -> int:
@@ -67,6 +72,10 @@ def _env_int(name: str, default: int) -> int:
 
 
 CHUNK_DURATION_SEC = _env_int("TRANSCRIBE_CHUNK_DURATION_SEC", 5 * 60)
+CHUNK_CONCURRENCY = _env_int("TRANSCRIBE_CHUNK_CONCURRENCY", 4)
+# md5 of the input, its PCM head and every chunk; off by default because it
+# re-reads the whole file and hashes all decoded audio.
+DIAGNOSTIC_HASHES = str(os.getenv("TRANSCRIBE_DIAGNOSTIC_HASHES", "0")).strip().lower() not in ("0", "false", "no")
 
 if not PROJECT_ID:
     raise RuntimeError("GCP_PROJECT_ID not set")
@@ -74,6 +83,8 @@ if not PROMPT_FILE or not PROMPT_NAME:
     raise RuntimeError("PROMPT_FILE or PROMPT_NAME not set")
 if CHUNK_DURATION_SEC < 30:
     raise RuntimeError("TRANSCRIBE_CHUNK_DURATION_SEC must be >= 30")
+if CHUNK_CONCURRENCY < 1:
+    raise RuntimeError("TRANSCRIBE_CHUNK_CONCURRENCY must be >= 1")
 
 # =========================================================
 # LOGGING
@@ -83,28 +94,13 @@ logger = logging.getLogger("worker.transcribe")
 
 # User value: supports log so the OCR/transcription journey stays clear and reliable.
 def log(msg: str):
-    logger.info("[TRANSCRIBE %s] %s", datetime.utcnow().isoformat(), msg)
-
-# =========================================================
-# REDIS (SAFE FACTORY)
-# =========================================================
-# User value: loads latest OCR/transcription data so users see current status.
-def get_redis():
-    return redis.Redis.from_url(
-        REDIS_URL,
-        decode_responses=True,
-        socket_keepalive=True,
-        socket_connect_timeout=2,
-        socket_timeout=15,
-        retry_on_timeout=True,
-        health_check_interval=15,
-    )
+    logger.info("[TRANSCRIBE %s] %s", utc_now_iso(), msg)
 
 # =========================================================
 # REDIS SAFE WRITE
 # =========================================================
 # User value: supports safe_hset so the OCR/transcription journey stays clear and reliable.
-def safe_hset(key: str, mapping: dict, retries: int = 1):
+def safe_hset(key: str, mapping: dict, retries: int = 1, **guard):
     policy = REDIS_POLICY
     if retries != REDIS_POLICY.max_retries:
         policy = type(REDIS_POLICY)(
@@ -124,6 +120,7 @@ def safe_hset(key: str, mapping: dict, retries: int = 1):
             mapping=mapping,
             context="TRANSCRIBE_SAFE_HSET",
             request_id=str(mapping.get("request_id") or ""),
+            **guard,
         )
         if not ok:
             log(f"Blocked status transition key={key} from={current_status} to={mapping.get('status')}")
@@ -151,28 +148,6 @@ model = GenerativeModel(MODEL_NAME)
 # =========================================================
 # PROMPT
 # =========================================================
-# User value: loads latest OCR/transcription data so users see current status.
-def load_named_prompt(prompt_file: str, prompt_name: str) -> str:
-    with open(prompt_file, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    variants = [prompt_name, f"{prompt_name}_PROMPT"] if not str(prompt_name).endswith("_PROMPT") else [prompt_name]
-    start = ""
-    for name in variants:
-        for prefix in ("### PROMPT: ", "### "):
-            marker = f"{prefix}{name}"
-            if marker in content:
-                start = marker
-                break
-        if start:
-            break
-    end = "=== END PROMPT ==="
-
-    if not start:
-        raise RuntimeError(f"Prompt '{prompt_name}' not found")
-
-    return content.split(start, 1)[1].split(end, 1)[0].strip()
-
 DEFAULT_AUDIO_PROMPT = load_named_prompt(PROMPT_FILE, PROMPT_NAME)
 PRAVACHAN_PROMPT = load_named_prompt(PROMPT_FILE, "PRAVACHAN_PROMPT")
 try:
@@ -193,21 +168,6 @@ def resolve_audio_prompt(job: dict) -> str:
 # =========================================================
 # UTILS
 # =========================================================
-# User value: supports sanitize_filename so the OCR/transcription journey stays clear and reliable.
-def sanitize_filename(name: str, max_len: int = 180) -> str:
-    name = unicodedata.normalize("NFKC", name)
-    name = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")
-    if not name:
-        name = "transcript"
-    return name[:max_len]
-
-
-# User value: normalizes data so users see consistent OCR/transcription results.
-def normalize_output_filename(raw_name: str | None) -> str:
-    stem, _ = os.path.splitext(raw_name or "transcript")
-    return f"{sanitize_filename(stem)}.txt"
-
-
 # User value: updates user-visible OCR/transcription state accurately.
 def update(job_id: str, *, stage: str, progress: int, status: str = "PROCESSING"):
     safe_hset(
@@ -217,21 +177,138 @@ def update(job_id: str, *, stage: str, progress: int, status: str = "PROCESSING"
             "status": status,
             "stage": stage,
             "progress": progress,
-            "updated_at": datetime.utcnow().isoformat(),
+            "updated_at": utc_now_iso(),
         },
     )
 
+
+# =========================================================
+# CHUNK TRANSCRIPT CACHE
+# =========================================================
+# Finished chunk texts survive a retry or DLQ replay of the same job so
+# only the missing chunks go back to Gemini. The chunk length is part of
+# the key because a different split produces different chunks. The cache is
+# only an optimisation, so any Redis error here is logged and ignored.
+CHUNK_CACHE_TTL_SEC = 24 * 60 * 60
+
+
+# User value: supports transcript_chunks_cache_key so the OCR/transcription journey stays clear and reliable.
+def transcript_chunks_cache_key(job_id: str) -> str:
+    return f"job_transcribe_chunks:{job_id}:{CHUNK_DURATION_SEC}"
+
+
+# User value: lets retried jobs resume from the chunks already transcribed.
+def load_cached_chunk_texts(job_id: str) -> dict[int, str]:
+    key = transcript_chunks_cache_key(job_id)
+    try:
+        raw = redis_retryable("redis_hgetall", key, lambda: get_redis().hgetall(key) or {})
+    except redis.exceptions.RedisError as exc:
+        log(f"Chunk cache read skipped key={key} error={exc}")
+        return {}
+    out: dict[int, str] = {}
+    for k, v in raw.items():
+        try:
+            out[int(k)] = v or ""
+        except ValueError:
+            continue
+    return out
+
+
+# User value: keeps finished chunk transcripts so a retry does not pay for them again.
+def cache_chunk_text(job_id: str, idx: int, text: str) -> None:
+    key = transcript_chunks_cache_key(job_id)
+
+    # User value: supports _write so the OCR/transcription journey stays clear and reliable.
+    def _write():
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hset(key, str(idx), text)
+        pipe.expire(key, CHUNK_CACHE_TTL_SEC)
+        pipe.execute()
+
+    try:
+        redis_retryable("redis_hset", f"{key}:{idx}", _write)
+    except redis.exceptions.RedisError as exc:
+        log(f"Chunk cache write skipped key={key} chunk={idx} error={exc}")
+
+
+# The transcript is already uploaded when this runs, so a Redis error must
+# not fail the job; the key expires on its own after CHUNK_CACHE_TTL_SEC.
+# User value: supports clear_cached_chunk_texts so the OCR/transcription journey stays clear and reliable.
+def clear_cached_chunk_texts(job_id: str) -> None:
+    key = transcript_chunks_cache_key(job_id)
+    try:
+        redis_retryable("redis_delete", key, lambda: get_redis().delete(key))
+    except redis.exceptions.RedisError as exc:
+        log(f"Chunk cache clear skipped key={key} error={exc}")
+
+# =========================================================
+# PROGRESS
+# =========================================================
+# One HMGET serves both the cancel check and the transition guard, so a
+# progress step costs two round trips instead of three.
+# User value: stops cancelled jobs and reports progress with fewer Redis round trips.
+def update_unless_cancelled(job_id: str, *, stage: str, progress: int):
+    if cancelled_locally(job_id):
+        raise JobCancelledError(f"Job {job_id} cancelled by user")
+
+    key = f"job_status:{job_id}"
+    status, cancel_requested = run_with_retry(
+        operation="redis_hmget",
+        target=key,
+        fn=lambda: get_redis().hmget(key, "status", "cancel_requested"),
+        retryable=(redis.exceptions.ConnectionError, redis.exceptions.TimeoutError),
+        policy=REDIS_POLICY,
+    )
+    if cancel_requested == "1" or (status or "").upper() == "CANCELLED":
+        note_cancelled(job_id)
+        raise JobCancelledError(f"Job {job_id} cancelled by user")
+
+    safe_hset(
+        key,
+        {
+            "contract_version": CONTRACT_VERSION,
+            "status": "PROCESSING",
+            "stage": stage,
+            "progress": progress,
+            "updated_at": utc_now_iso(),
+        },
+        current_status=status,
+    )
+
 # =========================================================
 # AUDIO SPLIT (DIAGNOSTIC)
 # =========================================================
-# User value: supports split_audio so the OCR/transcription journey stays clear and reliable.
-def split_audio(mp3_path: str) -> List[str]:
+# Only compressed sources are sent as-is; WAV/FLAC are several times larger
+# than the mp3 export and would bloat the inline Gemini request.
+PASSTHROUGH_MIME_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".aac": "audio/aac",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/opus",
+}
+PASSTHROUGH_MAX_BYTES = 15 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class AudioChunk:
+    name: str
+    data: bytes
+    mime_type: str
+    duration_ms: int
+
+
+# User value: supports load_audio so the OCR/transcription journey stays clear and reliable.
+def load_audio(mp3_path: str) -> AudioSegment:
     file_size = os.path.getsize(mp3_path)
-    with open(mp3_path, "rb") as f:
-        mp3_md5 = hashlib.md5(f.read()).hexdigest()
-
     log(f"MP3 file size={file_size} bytes")
-    log(f"MP3 md5={mp3_md5}")
+    if DIAGNOSTIC_HASHES:
+        digest = hashlib.md5()
+        with open(mp3_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        mp3_md5 = digest.hexdigest()
+        log(f"MP3 md5={mp3_md5}")
 
     audio = AudioSegment.from_file(mp3_path)
 
@@ -240,51 +317,107 @@ def split_audio(mp3_path: str) -> List[str]:
     log(f"Decoded sample_width={audio.sample_width}")
     log(f"Decoded duration_ms={len(audio)}")
 
-    pcm_head = audio[:30000].raw_data
-    pcm_md5 = hashlib.md5(pcm_head).hexdigest()
-    log(f"PCM head (30s) md5={pcm_md5}")
+    if DIAGNOSTIC_HASHES:
+        pcm_md5 = hashlib.md5(audio[:30000].raw_data).hexdigest()
+        log(f"PCM head (30s) md5={pcm_md5}")
 
     duration_sec = int(len(audio) / 1000)
     log(f"Audio duration seconds={duration_sec}")
+    return audio
+
 
+# User value: supports audio_chunk_count so the OCR/transcription journey stays clear and reliable.
+def audio_chunk_count(audio: AudioSegment) -> int:
     chunk_ms = CHUNK_DURATION_SEC * 1000
-    chunks = []
+    return max(1, -(-len(audio) // chunk_ms))
+
+
+# mp3 sources are cut on frame boundaries with ffmpeg stream copy, so
+# chunking costs a demux instead of a full LAME encode per chunk.
+# User value: prepares long mp3 recordings for transcription without spending CPU on re-encoding.
+def copy_mp3_segment(mp3_path: str, start_ms: int, duration_ms: int) -> bytes | None:
+    cmd = [
+        AudioSegment.converter,
+        "-v", "error",
+        "-ss", f"{start_ms / 1000:.3f}",
+        "-t", f"{duration_ms / 1000:.3f}",
+        "-i", mp3_path,
+        "-map", "0:a:0",
+        "-c:a", "copy",
+        "-f", "mp3",
+        "pipe:1",
+    ]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        stderr = getattr(exc, "stderr", b"") or b""
+        log(f"Stream copy failed start_ms={start_ms}; re-encoding chunk error={exc} {stderr[-200:]!r}")
+        return None
+    return proc.stdout or None
 
+
+# Exports lazily so callers can start transcribing chunk 1 while later
+# chunks are still being encoded. Chunks are encoded into memory rather
+# than written to /tmp and read back, and a small compressed file that fits
+# in one chunk is sent as-is instead of being re-encoded to mp3.
+# User value: supports iter_audio_chunks so the OCR/transcription journey stays clear and reliable.
+def iter_audio_chunks(audio: AudioSegment, mp3_path: str):
+    chunk_ms = CHUNK_DURATION_SEC * 1000
+    stem, ext = os.path.splitext(os.path.basename(mp3_path))
+
+    if (
+        len(audio) <= chunk_ms
+        and ext.lower() in PASSTHROUGH_MIME_TYPES
+        and os.path.getsize(mp3_path) <= PASSTHROUGH_MAX_BYTES
+    ):
+        log(f"Single chunk; using source file={os.path.basename(mp3_path)} without re-encoding")
+        with open(mp3_path, "rb") as f:
+            yield AudioChunk(
+                name=os.path.basename(mp3_path),
+                data=f.read(),
+                mime_type=PASSTHROUGH_MIME_TYPES[ext.lower()],
+                duration_ms=len(audio),
+            )
+        return
+
+    stream_copy = ext.lower() == ".mp3"
     for i, start in enumerate(range(0, len(audio), chunk_ms), start=1):
-        chunk_audio = audio[start:start + chunk_ms]
+        duration_ms = min(chunk_ms, len(audio) - start)
 
-        chunk_pcm_md5 = hashlib.md5(chunk_audio.raw_data).hexdigest()
-        log(
-            f"Chunk {i} duration_ms={len(chunk_audio)} "
-            f"pcm_md5={chunk_pcm_md5}"
-        )
+        if DIAGNOSTIC_HASHES:
+            chunk_pcm_md5 = hashlib.md5(audio[start:start + chunk_ms].raw_data).hexdigest()
+            log(
+                f"Chunk {i} duration_ms={duration_ms} "
+                f"pcm_md5={chunk_pcm_md5}"
+            )
+        else:
+            log(f"Chunk {i} duration_ms={duration_ms}")
 
-        out = mp3_path.replace(".mp3", f"_chunk_{i}.mp3")
-        chunk_audio.export(out, format="mp3")
+        data = copy_mp3_segment(mp3_path, start, duration_ms) if stream_copy else None
+        if data is None:
+            stream_copy = False
+            buf = io.BytesIO()
+            audio[start:start + chunk_ms].export(buf, format="mp3")
+            data = buf.getvalue()
 
-        log(f"Created chunk file={os.path.basename(out)}")
-        chunks.append(out)
+        name = f"{stem}_chunk_{i}.mp3"
+        log(f"Created chunk={name} bytes={len(data)} stream_copy={stream_copy}")
+        yield AudioChunk(name=name, data=data, mime_type="audio/mpeg", duration_ms=duration_ms)
 
-    log(f"Total chunks={len(chunks)} (chunk_duration_sec={CHUNK_DURATION_SEC})")
-    return chunks
 
 # =========================================================
 # GEMINI ASR
 # =========================================================
 # User value: supports transcribe_chunk so the OCR/transcription journey stays clear and reliable.
-def transcribe_chunk(mp3_path: str, idx: int, total: int, prompt_text: str) -> str:
+def transcribe_chunk(chunk: AudioChunk, idx: int, total: int, prompt_text: str) -> str:
     log(f"Gemini ASR chunk {idx}/{total}")
-
-    with open(mp3_path, "rb") as f:
-        audio_bytes = f.read()
-
-    log(f"Chunk {idx} mp3 size={len(audio_bytes)} bytes")
+    log(f"Chunk {idx} size={len(chunk.data)} bytes mime_type={chunk.mime_type}")
 
     t0 = time.perf_counter()
     response = model.generate_content(
         [
             Part.from_text(prompt_text),
-            Part.from_data(audio_bytes, mime_type="audio/mpeg"),
+            Part.from_data(chunk.data, mime_type=chunk.mime_type),
         ],
         generation_config={"temperature": 0, "max_output_tokens": 8192},
     )
@@ -298,18 +431,64 @@ def transcribe_chunk(mp3_path: str, idx: int, total: int, prompt_text: str) -> s
     log(f"Chunk {idx} transcript chars={len(text)}")
     return text
 
+
+# Chunks are independent Gemini calls, so they run concurrently. At most
+# workers + 2 chunks are exported ahead of the pool, which bounds memory
+# and lets a failed chunk stop the export early; results are kept in chunk
+# order and progress is written from the calling thread only.
+# User value: shortens long-audio transcription by overlapping Gemini requests.
+def transcribe_chunks(job_id: str, chunks, total: int, prompt_text: str) -> List[tuple[int, str]]:
+    workers = max(1, min(CHUNK_CONCURRENCY, total))
+    cached = load_cached_chunk_texts(job_id)
+    if cached:
+        log(f"Resuming transcription cached_chunks={len(cached)} job_id={job_id}")
+
+    # User value: skips remaining Gemini calls once the user cancels.
+    def _transcribe_one(idx: int, chunk: AudioChunk) -> str:
+        ensure_not_cancelled(job_id)
+        text = transcribe_chunk(chunk, idx, total, prompt_text)
+        cache_chunk_text(job_id, idx, text)
+        return text
+
+    update(job_id, stage=f"Transcribing chunk 0/{total}", progress=10)
+    durations_ms: List[int] = []
+    futures = {}
+    slots = threading.Semaphore(workers + 2)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcribe-chunk")
+    try:
+        for idx, chunk in enumerate(chunks, start=1):
+            ensure_not_cancelled(job_id)
+            durations_ms.append(chunk.duration_ms)
+            if idx in cached:
+                continue
+            slots.acquire()
+            failed = next((f for f in futures if f.done() and f.exception() is not None), None)
+            if failed is not None:
+                failed.result()
+            future = pool.submit(_transcribe_one, idx, chunk)
+            future.add_done_callback(lambda _f: slots.release())
+            futures[future] = idx
+        log(f"Total chunks={len(durations_ms)} (chunk_duration_sec={CHUNK_DURATION_SEC})")
+
+        texts: List[str] = [cached.get(idx, "") for idx in range(1, len(durations_ms) + 1)]
+        first_done = len(durations_ms) - len(futures) + 1
+        for done, future in enumerate(as_completed(futures), start=first_done):
+            texts[futures[future] - 1] = future.result()
+            if progress_due(job_id, force=done == len(durations_ms)):
+                update_unless_cancelled(
+                    job_id,
+                    stage=f"Transcribing chunk {done}/{len(durations_ms)}",
+                    progress=10 + int((done / len(durations_ms)) * 80),
+                )
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return list(zip(durations_ms, texts))
+
 # =========================================================
 # ENTRYPOINT
 # =========================================================
-# User value: supports run_transcription so the OCR/transcription journey stays clear and reliable.
-def run_transcription(job_id: str, job: dict, *, finalize: bool = True) -> dict:
-    ensure_not_cancelled(job_id)
-    if "input_gcs_uri" not in job:
-        raise RuntimeError("input_gcs_uri missing in job payload")
-
-    input_gcs_uri = job["input_gcs_uri"]
-    local_input = download_from_gcs(input_gcs_uri)
-
+# User value: decodes and transcribes a downloaded recording chunk by chunk.
+def _transcribe_local_input(job_id: str, job: dict, local_input: str) -> List[tuple[int, str]]:
     if not os.path.exists(local_input):
         raise FileNotFoundError(local_input)
 
@@ -318,26 +497,36 @@ def run_transcription(job_id: str, job: dict, *, finalize: bool = True) -> dict:
     ensure_not_cancelled(job_id)
     update(job_id, stage="Preparing audio", progress=5)
 
-    chunks = split_audio(local_input)
-    total = len(chunks)
+    audio = load_audio(local_input)
+    total = audio_chunk_count(audio)
     prompt_text = resolve_audio_prompt(job)
 
-    log(f"Transcription strategy chunk_duration_sec={CHUNK_DURATION_SEC} job_id={job_id}")
+    log(
+        f"Transcription strategy chunk_duration_sec={CHUNK_DURATION_SEC} "
+        f"chunk_concurrency={min(CHUNK_CONCURRENCY, total)} job_id={job_id}"
+    )
+
+    return transcribe_chunks(job_id, iter_audio_chunks(audio, local_input), total, prompt_text)
+
+
+# User value: supports run_transcription so the OCR/transcription journey stays clear and reliable.
+def run_transcription(job_id: str, job: dict, *, finalize: bool = True) -> dict:
+    ensure_not_cancelled(job_id)
+    if "input_gcs_uri" not in job:
+        raise RuntimeError("input_gcs_uri missing in job payload")
+
+    # The input is removed as soon as every chunk is transcribed, and on any
+    # earlier error or cancellation.
+    with downloaded_input(job["input_gcs_uri"], probe_size=True) as local_input:
+        results = _transcribe_local_input(job_id, job, local_input)
 
     texts: List[str] = []
     segment_rows: List[dict] = []
     segment_start_sec = 0.0
 
-    for idx, chunk in enumerate(chunks, start=1):
-        ensure_not_cancelled(job_id)
-        update(
-            job_id,
-            stage=f"Transcribing chunk {idx}/{total}",
-            progress=10 + int((idx / total) * 80),
-        )
-        text = transcribe_chunk(chunk, idx, total, prompt_text)
+    for idx, (duration_ms, text) in enumerate(results, start=1):
         texts.append(text)
-        chunk_duration_sec = round(len(AudioSegment.from_file(chunk)) / 1000.0, 2)
+        chunk_duration_sec = round(duration_ms / 1000.0, 2)
         seg_score, seg_metrics, seg_hints = score_segment(text)
         segment_rows.append(
             {
@@ -362,6 +551,7 @@ def run_transcription(job_id: str, job: dict, *, finalize: bool = True) -> dict:
         content=final_text,
         destination_path=f"jobs/{job_id}/{output_filename}",
     )
+    clear_cached_chunk_texts(job_id)
 
     if finalize:
         safe_hset(
@@ -381,7 +571,7 @@ def run_transcription(job_id: str, job: dict, *, finalize: bool = True) -> dict:
                 "low_confidence_segments": json.dumps(low_confidence_segments, ensure_ascii=False),
                 "segment_quality": json.dumps(segment_rows, ensure_ascii=False),
                 "transcript_quality_hints": json.dumps(transcript_quality_hints, ensure_ascii=False),
-                "updated_at": datetime.utcnow().isoformat(),
+                "updated_at": utc_now_iso(),
             },
         )
 
@@ -0,0 +1,16 @@
+# User value: This file helps users get reliable OCR/transcription results with clear processing behavior.
+import time
+from datetime import datetime, timezone
+
+_ts_cache: tuple[int, str] = (0, "")
+
+
+# User value: keeps status timestamps cheap on the hot path by formatting each wall-clock second once.
+def utc_now_iso() -> str:
+    global _ts_cache
+    sec = int(time.time())
+    cached_sec, cached_iso = _ts_cache
+    if sec != cached_sec:
+        cached_iso = datetime.fromtimestamp(sec, timezone.utc).replace(tzinfo=None).isoformat()
+        _ts_cache = (sec, cached_iso)
+    return cached_iso
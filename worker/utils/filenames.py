@@ -0,0 +1,22 @@
+# User value: This file helps users get reliable OCR/transcription results with clear processing behavior.
+import os
+import re
+import unicodedata
+
+_FILENAME_UNSAFE_RE = re.compile(r"[^A-Za-z0-9]+")
+
+
+# User value: supports sanitize_filename so the OCR/transcription journey stays clear and reliable.
+def sanitize_filename(name: str, max_len: int = 180) -> str:
+    if not name.isascii():
+        name = unicodedata.normalize("NFKC", name)
+    name = _FILENAME_UNSAFE_RE.sub("_", name).strip("_")
+    if not name:
+        name = "transcript"
+    return name[:max_len]
+
+
+# User value: normalizes data so users see consistent OCR/transcription results.
+def normalize_output_filename(raw_name: str | None) -> str:
+    stem, _ = os.path.splitext(raw_name or "transcript")
+    return f"{sanitize_filename(stem)}.txt"
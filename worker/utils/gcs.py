@@ -5,13 +5,29 @@
 import os
 import json
 import base64
+import shutil
+import tempfile
+import threading
 import time
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import timedelta
 from google.cloud import storage
+from requests.adapters import HTTPAdapter
 import logging
 from worker.metrics import incr, observe_ms
+from worker.utils.clock import utc_now_iso
 from worker.utils.retry_policy import GCS_POLICY, run_with_retry
 
+# transfer_manager exists from google-cloud-storage 2.7, but
+# download_chunks_concurrently only from 2.10; older installs download in
+# a single stream.
+try:
+    from google.cloud.storage import transfer_manager
+except ImportError:
+    transfer_manager = None
+if not hasattr(transfer_manager, "download_chunks_concurrently"):
+    transfer_manager = None
+
 # ---------------------------------------------------------
 # CONFIG
 # ---------------------------------------------------------
@@ -20,7 +36,17 @@ GCS_BUCKET = os.environ.get("GCS_BUCKET_NAME")
 if not GCS_BUCKET:
     raise RuntimeError("GCS_BUCKET_NAME env var not set")
 
+# Files above this size are downloaded as parallel ranged parts.
+PARALLEL_DOWNLOAD_MIN_BYTES = int(os.getenv("GCS_PARALLEL_DOWNLOAD_MIN_MB", "32")) * 1024 * 1024
+PARALLEL_DOWNLOAD_CHUNK_BYTES = 32 * 1024 * 1024
+PARALLEL_DOWNLOAD_WORKERS = 8
+# requests defaults to 10 pooled connections per host, fewer than the job
+# threads plus transfer_manager workers that share this client.
+HTTP_POOL_SIZE = 32
+DOWNLOAD_DIR_PREFIX = "doc-worker-input-"
+
 _client = None
+_client_lock = threading.Lock()
 logger = logging.getLogger(__name__)
 
 
@@ -92,13 +118,21 @@ def _get_client():
     if _client is not None:
         return _client
 
+    with _client_lock:
+        if _client is None:
+            _client = _build_client()
+    return _client
+
+
+# User value: keeps GCS transfers on warm keep-alive connections shared by all job threads.
+def _build_client():
     creds_env = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS_JSON")
     if creds_env:
         creds_env = creds_env.strip()
         if os.path.isfile(creds_env):
             # Support passing a credential file path in this env var.
             os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = creds_env
-            _client = storage.Client()
+            client = storage.Client()
             service_account_email = ""
             try:
                 with open(creds_env, "r", encoding="utf-8") as f:
@@ -107,16 +141,16 @@ def _get_client():
                 pass
             logger.info(
                 "gcp_identity source=GOOGLE_APPLICATION_CREDENTIALS_JSON_PATH project=%s service_account=%s",
-                getattr(_client, "project", "") or "",
+                getattr(client, "project", "") or "",
                 service_account_email,
             )
         else:
             creds = _parse_service_account_json(creds_env)
             if creds.get("type") == "service_account":
-                _client = storage.Client.from_service_account_info(creds)
+                client = storage.Client.from_service_account_info(creds)
                 logger.info(
                     "gcp_identity source=GOOGLE_APPLICATION_CREDENTIALS_JSON project=%s service_account=%s",
-                    getattr(_client, "project", "") or "",
+                    getattr(client, "project", "") or "",
                     str(creds.get("client_email") or ""),
                 )
             else:
@@ -125,13 +159,15 @@ def _get_client():
                     "Use a service-account JSON payload, or set this env var to a credential file path."
                 )
     else:
-        _client = storage.Client()
+        client = storage.Client()
         logger.info(
             "gcp_identity source=ADC project=%s service_account=",
-            getattr(_client, "project", "") or "",
+            getattr(client, "project", "") or "",
         )
 
-    return _client
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    client._http.mount("https://", adapter)
+    return client
 
 
 def _parse_service_account_json(creds_env: str) -> dict:
@@ -274,7 +310,7 @@ def upload_file(*, local_path: str, destination_path: str) -> dict:
 # ---------------------------------------------------------
 # User value: supports append_log so the OCR/transcription journey stays clear and reliable.
 def append_log(job_id: str, message: str):
-    ts = datetime.utcnow().isoformat() + "Z"
+    ts = utc_now_iso() + "Z"
     path = f"jobs/{job_id}/logs/worker.log"
 
     client = _get_client()
@@ -295,20 +331,68 @@ def append_log(job_id: str, message: str):
 # DOWNLOAD FROM GCS (LOCAL)
 # ---------------------------------------------------------
 # User value: lets users fetch generated OCR/transcription output reliably.
-def download_from_gcs(gcs_uri: str) -> str:
+def download_from_gcs(gcs_uri: str, *, probe_size: bool = False) -> str:
     logger.info(f"GCS download started: gcs_uri={gcs_uri}")
 
     path = gcs_uri.replace("gs://", "")
     bucket_name, blob_path = path.split("/", 1)
 
-    local_path = f"/tmp/{os.path.basename(blob_path)}"
+    # A private directory per download keeps concurrent jobs with the same
+    # file name from overwriting or deleting each other's input.
+    local_path = os.path.join(
+        tempfile.mkdtemp(prefix=DOWNLOAD_DIR_PREFIX),
+        os.path.basename(blob_path),
+    )
     client = _get_client()
     blob = client.bucket(bucket_name).blob(blob_path)
-    _retry_io(
-        operation="download",
-        target=gcs_uri,
-        fn=lambda: blob.download_to_filename(local_path),
-    )
+
+    # The size needs a metadata GET, so it is only looked up when the caller
+    # expects inputs large enough for a parallel download to pay off.
+    # User value: fetches large inputs over several connections so long recordings start processing sooner.
+    def _download():
+        if probe_size and transfer_manager is not None:
+            blob.reload()
+            if (blob.size or 0) > PARALLEL_DOWNLOAD_MIN_BYTES:
+                transfer_manager.download_chunks_concurrently(
+                    blob,
+                    local_path,
+                    chunk_size=PARALLEL_DOWNLOAD_CHUNK_BYTES,
+                    max_workers=PARALLEL_DOWNLOAD_WORKERS,
+                    worker_type=transfer_manager.THREAD,
+                )
+                return
+        blob.download_to_filename(local_path)
+
+    try:
+        _retry_io(
+            operation="download",
+            target=gcs_uri,
+            fn=_download,
+        )
+    except Exception:
+        discard_local_copy(local_path)
+        raise
 
     logger.info(f"GCS download completed: local_path={local_path}")
     return local_path
+
+
+# User value: frees worker disk and page cache as soon as a downloaded input is no longer needed.
+def discard_local_copy(local_path: str) -> None:
+    try:
+        os.unlink(local_path)
+    except OSError:
+        pass
+    parent = os.path.dirname(local_path)
+    if os.path.basename(parent).startswith(DOWNLOAD_DIR_PREFIX):
+        shutil.rmtree(parent, ignore_errors=True)
+
+
+# User value: guarantees a downloaded input is removed however the job ends, including cancellation.
+@contextmanager
+def downloaded_input(gcs_uri: str, *, probe_size: bool = False):
+    local_path = download_from_gcs(gcs_uri, probe_size=probe_size)
+    try:
+        yield local_path
+    finally:
+        discard_local_copy(local_path)
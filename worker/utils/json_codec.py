@@ -0,0 +1,28 @@
+# User value: This file helps users get reliable OCR/transcription results with clear processing behavior.
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+# User value: parses queued job payloads quickly straight from Redis bytes.
+def loads(data: bytes | str):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# User value: serializes job payloads to UTF-8 bytes ready for Redis without an extra encode.
+def dumps_bytes(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+# User value: serializes status fields such as recovery traces to compact JSON text.
+def dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
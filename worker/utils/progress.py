@@ -0,0 +1,25 @@
+# User value: This file helps users get reliable OCR/transcription results with clear processing behavior.
+import threading
+import time
+
+# Progress bars cannot show changes faster than this, so intermediate
+# writes inside the window are dropped.
+PROGRESS_MIN_INTERVAL_SEC = 0.5
+_MAX_TRACKED_JOBS = 1024
+
+_last_progress_at: dict[str, float] = {}
+_lock = threading.Lock()
+
+
+# User value: keeps progress updates flowing to users without flooding Redis with writes nobody can see.
+def progress_due(job_id: str, *, force: bool = False) -> bool:
+    now = time.monotonic()
+    with _lock:
+        last = _last_progress_at.pop(job_id, None)
+        if not force and last is not None and now - last < PROGRESS_MIN_INTERVAL_SEC:
+            _last_progress_at[job_id] = last
+            return False
+        _last_progress_at[job_id] = now
+        while len(_last_progress_at) > _MAX_TRACKED_JOBS:
+            del _last_progress_at[next(iter(_last_progress_at))]
+    return True
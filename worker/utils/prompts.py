@@ -0,0 +1,28 @@
+# User value: This file helps users get reliable OCR/transcription results with clear processing behavior.
+from functools import lru_cache
+
+
+# Cached because OCR resolves its prompt once per page; prompt files only
+# change with a deploy.
+# User value: loads latest OCR/transcription data so users see current status.
+@lru_cache(maxsize=64)
+def load_named_prompt(prompt_file: str, prompt_name: str) -> str:
+    with open(prompt_file, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    variants = [prompt_name, f"{prompt_name}_PROMPT"] if not str(prompt_name).endswith("_PROMPT") else [prompt_name]
+    start = ""
+    for name in variants:
+        for prefix in ("### PROMPT: ", "### "):
+            marker = f"{prefix}{name}"
+            if marker in content:
+                start = marker
+                break
+        if start:
+            break
+    end = "=== END PROMPT ==="
+
+    if not start:
+        raise RuntimeError(f"Prompt '{prompt_name}' not found")
+
+    return content.split(start, 1)[1].split(end, 1)[0].strip()
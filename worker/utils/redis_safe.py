@@ -2,21 +2,37 @@
 import redis
 import os
 import logging
+import threading
+
+from worker.utils.retry_policy import REDIS_POLICY, run_with_retry
 
 logger = logging.getLogger("worker.redis")
 
-REDIS_URL = os.getenv("REDIS_URL")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_RETRYABLE = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+
+# One pooled client per process, shared by every module that writes job
+# state; the pool drops broken sockets and health_check_interval
+# re-validates idle ones, so retries reconnect.
+_client = None
+_client_lock = threading.Lock()
 
 # User value: loads latest OCR/transcription data so users see current status.
 def get_redis():
-    return redis.from_url(
-        REDIS_URL,
-        decode_responses=True,
-        socket_keepalive=True,
-        socket_connect_timeout=2,
-        retry_on_timeout=True,
-        health_check_interval=15,
-    )
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.from_url(
+                    REDIS_URL,
+                    decode_responses=True,
+                    socket_keepalive=True,
+                    socket_connect_timeout=2,
+                    socket_timeout=15,
+                    retry_on_timeout=True,
+                    health_check_interval=15,
+                )
+    return _client
 
 # User value: supports safe_hset so the OCR/transcription journey stays clear and reliable.
 def safe_hset(key, mapping, retries=1):
@@ -29,3 +45,13 @@ def safe_hset(key, mapping, retries=1):
             logger.error(f"Redis HSET failed (attempt {attempt+1}): {e}")
             if attempt >= retries:
                 raise
+
+# User value: improves reliability when OCR/transcription dependencies fail transiently.
+def redis_retryable(op, target, fn):
+    return run_with_retry(
+        operation=op,
+        target=target,
+        fn=fn,
+        retryable=REDIS_RETRYABLE,
+        policy=REDIS_POLICY,
+    )
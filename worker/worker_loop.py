@@ -1,37 +1,38 @@
 # User value: This file helps users get reliable OCR/transcription results with clear processing behavior.
-import json
 import time
 import logging
 import os
 import random
 import subprocess
-from datetime import datetime
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 import socket
 import redis
 from dotenv import load_dotenv
 
-from worker.cancel import JobCancelledError, is_cancelled
+from worker.cancel import JobCancelledError, is_cancelled, start_cancel_listener
 from worker.contract import CONTRACT_VERSION
-from worker.status_machine import guarded_hset
+from worker.status_machine import claim_for_processing, finalize_completed, guarded_hset
 from worker.error_catalog import classify_error
 from worker.dead_letter import build_dead_letter_entry
 from worker.recovery_policy import decide_recovery_action
 from worker.json_logging import configure_json_logging
-from worker.metrics import incr, observe_ms
+from worker.metrics import incr, incr_labels, observe_ms_labels
 from worker.startup_env import validate_startup_env
+from worker.utils import json_codec
+from worker.utils.clock import utc_now_iso
+from worker.utils.redis_safe import REDIS_RETRYABLE
 
 # Load .env for local runs
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env"))
 
-# =========================================================
-# LOGGING SETUP
-# =========================================================
-level_name = os.getenv("LOG_LEVEL", "INFO").upper()
-level = getattr(logging, level_name, logging.INFO)
-configure_json_logging(service="doc-transcribe-worker", level=level)
 logger = logging.getLogger("worker")
-validate_startup_env()
-from worker.dispatcher import dispatch
+
+# Bound by main() once startup env validation has passed; importing the
+# dispatcher pulls in the OCR/transcription engines and their GCP clients.
+dispatch = None
 
 
 # User value: supports log_stage_event so the OCR/transcription journey stays clear and reliable.
@@ -69,15 +70,6 @@ OCR_DLQ_NAME = os.getenv("OCR_DLQ_NAME", "doc_jobs_ocr_dead")
 TRANSCRIPTION_QUEUE_NAME = os.getenv("TRANSCRIPTION_QUEUE_NAME", "doc_jobs_transcription")
 TRANSCRIPTION_DLQ_NAME = os.getenv("TRANSCRIPTION_DLQ_NAME", "doc_jobs_transcription_dead")
 
-logger.info(
-    "worker_gcp_config project_id=%s bucket=%s credentials_path=%s credentials_json_set=%s",
-    os.getenv("GCP_PROJECT_ID", ""),
-    os.getenv("GCS_BUCKET_NAME", ""),
-    os.getenv("GOOGLE_APPLICATION_CREDENTIALS", ""),
-    "1" if os.getenv("GOOGLE_APPLICATION_CREDENTIALS_JSON") else "0",
-)
-
-
 def _detect_gcloud_account() -> str:
     try:
         out = subprocess.check_output(
@@ -94,35 +86,111 @@ def _detect_gcloud_account() -> str:
     return ""
 
 
-logger.info("gcloud_active_account=%s", _detect_gcloud_account())
-
 WORKER_MAX_INFLIGHT_OCR = int(os.getenv("WORKER_MAX_INFLIGHT_OCR", "1"))
 WORKER_MAX_INFLIGHT_TRANSCRIPTION = int(os.getenv("WORKER_MAX_INFLIGHT_TRANSCRIPTION", "1"))
 RETRY_BUDGET_TRANSIENT = int(os.getenv("RETRY_BUDGET_TRANSIENT", "2"))
 RETRY_BUDGET_MEDIA = int(os.getenv("RETRY_BUDGET_MEDIA", "0"))
 RETRY_BUDGET_DEFAULT = int(os.getenv("RETRY_BUDGET_DEFAULT", "0"))
 
+# Total jobs dispatched concurrently; per-type admission limits still apply.
+WORKER_JOB_THREADS = max(
+    1,
+    int(os.getenv("WORKER_CONCURRENCY", "0"))
+    or max(WORKER_MAX_INFLIGHT_OCR, WORKER_MAX_INFLIGHT_TRANSCRIPTION),
+)
+
 BRPOP_TIMEOUT = 10              # seconds
-MAX_IDLE_BEFORE_RECONNECT = 60  # seconds (use 3600 in prod)
+HEARTBEAT_INTERVAL_SEC = 60     # seconds between idle heartbeat logs
+WORKER_PREFETCH_COUNT = int(os.getenv("WORKER_PREFETCH_COUNT", "1"))
+# Popped payloads are parked in processing:<id>:<queue> until the job is
+# finished, and moved back to their queue on the next start with the same id.
+# Each worker also keeps processing_owner:<id> alive; lists whose owner key
+# has expired are taken over by any worker. The default id includes the pid
+# so processes sharing a host never drain each other's in-flight jobs.
+WORKER_PROCESSING_LIST = str(os.getenv("WORKER_PROCESSING_LIST", "1")).strip().lower() not in ("0", "false", "no")
+WORKER_PROCESSING_ID = (
+    str(os.getenv("WORKER_PROCESSING_ID", "")).strip() or f"{socket.gethostname()}:{os.getpid()}"
+)
+PROCESSING_OWNER_TTL_SEC = 90
+PROCESSING_OWNER_REFRESH_SEC = 30
+PROCESSING_ORPHAN_SWEEP_INTERVAL_SEC = 60
+WORKER_HEALTH_LOG_INTERVAL_SEC = int(os.getenv("WORKER_HEALTH_LOG_INTERVAL_SEC", "10"))
 INFLIGHT_REQUEUE_BACKOFF_BASE_SEC = float(os.getenv("INFLIGHT_REQUEUE_BACKOFF_BASE_SEC", "0.5"))
 INFLIGHT_REQUEUE_BACKOFF_MAX_SEC = float(os.getenv("INFLIGHT_REQUEUE_BACKOFF_MAX_SEC", "5.0"))
 INFLIGHT_REQUEUE_BACKOFF_JITTER_SEC = float(os.getenv("INFLIGHT_REQUEUE_BACKOFF_JITTER_SEC", "0.25"))
 INFLIGHT_STALE_SWEEP_INTERVAL_SEC = int(os.getenv("INFLIGHT_STALE_SWEEP_INTERVAL_SEC", "15"))
+WORKER_CANCEL_PUBSUB = str(os.getenv("WORKER_CANCEL_PUBSUB", "1")).strip().lower() not in ("0", "false", "no")
+INFLIGHT_CAPACITY_SIGNAL_TTL_SEC = int(os.getenv("INFLIGHT_CAPACITY_SIGNAL_TTL_SEC", "3600"))
 WORKER_SCHEDULER_POLICY = str(os.getenv("WORKER_SCHEDULER_POLICY", "adaptive")).strip().lower() or "adaptive"
 WORKER_SCHEDULER_MAX_CONSECUTIVE = int(os.getenv("WORKER_SCHEDULER_MAX_CONSECUTIVE", "2"))
 WORKER_SCHEDULER_ACTIVE_DEPTH_MIN = int(os.getenv("WORKER_SCHEDULER_ACTIVE_DEPTH_MIN", "1"))
 _TERMINAL_STATUSES = {"COMPLETED", "FAILED", "CANCELLED"}
+_JOB_TYPE_UPPER = {
+    "ocr": "OCR",
+    "OCR": "OCR",
+    "transcription": "TRANSCRIPTION",
+    "TRANSCRIPTION": "TRANSCRIPTION",
+}
+_RETRY_BACKOFFS = tuple(min(5.0, 0.5 * (1 << i)) for i in range(16))
+_RETRY_BACKOFF_JITTER_RATIO = 0.2
 _requeue_hits: dict[str, int] = {}
 _last_inflight_sweep_ts: dict[str, float] = {}
 _last_dequeue_queue = ""
 _last_dequeue_streak = 0
+_prefetched_jobs: deque[tuple[bytes, bytes]] = deque()
+_blmpop_supported = True
+_next_health_log_ts = 0.0
+_next_heartbeat_ts = 0.0
+_next_orphan_sweep_ts = 0.0
+
+# Constant fields of the status hashes written on every job; per-job
+# fields (request_id, updated_at, ...) are merged in at the call site.
+# The claim/finalize writes happen for every job, so their constant
+# fields are kept as pre-encoded HSET argv for the status Lua scripts.
+_PROCESSING_ARGV = (
+    b"contract_version", CONTRACT_VERSION.encode(),
+    b"status", b"PROCESSING",
+    b"stage", b"Processing started",
+    b"progress", b"1",
+)
+_COMPLETED_ARGV = (
+    b"contract_version", CONTRACT_VERSION.encode(),
+    b"status", b"COMPLETED",
+    b"progress", b"100",
+    b"error_code", b"",
+    b"error_message", b"",
+    b"error_detail", b"",
+    b"error", b"",
+)
+_CANCELLED_STATUS_TEMPLATE = {
+    "contract_version": CONTRACT_VERSION,
+    "status": "CANCELLED",
+    "stage": "Cancelled by user",
+    "error_code": "CANCELLED_BY_USER",
+    "error_message": "Job was cancelled by user.",
+    "error_detail": "",
+    "error": "Job was cancelled by user.",
+}
+_RETRY_QUEUED_STATUS_TEMPLATE = {
+    "contract_version": CONTRACT_VERSION,
+    "status": "QUEUED",
+}
+_FAILED_STATUS_TEMPLATE = {
+    "contract_version": CONTRACT_VERSION,
+    "status": "FAILED",
+    "stage": "Processing failed",
+    "recovery_action": "fail_fast_dlq",
+}
+_CANCELLED_ARGV = tuple(
+    part.encode() for field, value in _CANCELLED_STATUS_TEMPLATE.items() for part in (field, value)
+)
 
 
 # =========================================================
 # QUEUE RESOLUTION
 # =========================================================
 # User value: routes work so user OCR/transcription jobs are processed correctly.
-def queue_targets() -> list[str]:
+def _compute_queue_targets() -> list[str]:
     if QUEUE_MODE == "both":
         targets = [LOCAL_QUEUE_NAME, CLOUD_QUEUE_NAME]
     elif QUEUE_MODE == "partitioned":
@@ -140,41 +208,47 @@ def queue_targets() -> list[str]:
     return ordered
 
 
+# Queue routing is fixed by env at startup, so targets, DLQs and source labels
+# are resolved once. Later entries win, matching the old if-chain priority.
+_QUEUE_TARGETS = _compute_queue_targets()
+if QUEUE_MODE == "both":
+    _DLQ_MAP = {LOCAL_QUEUE_NAME: LOCAL_DLQ_NAME, CLOUD_QUEUE_NAME: CLOUD_DLQ_NAME}
+    _SOURCE_MAP = {LOCAL_QUEUE_NAME: "LOCAL", CLOUD_QUEUE_NAME: "CLOUD"}
+    _DEFAULT_SOURCE = "UNKNOWN"
+elif QUEUE_MODE == "partitioned":
+    _DLQ_MAP = {TRANSCRIPTION_QUEUE_NAME: TRANSCRIPTION_DLQ_NAME, OCR_QUEUE_NAME: OCR_DLQ_NAME}
+    _SOURCE_MAP = {TRANSCRIPTION_QUEUE_NAME: "TRANSCRIPTION", OCR_QUEUE_NAME: "OCR"}
+    _DEFAULT_SOURCE = "UNKNOWN"
+else:
+    _DLQ_MAP = {}
+    _SOURCE_MAP = {}
+    _DEFAULT_SOURCE = "SINGLE"
+
+
+# User value: routes work so user OCR/transcription jobs are processed correctly.
+def queue_targets() -> list[str]:
+    # Shared list; callers must not mutate it.
+    return _QUEUE_TARGETS
+
+
 # User value: routes work so user OCR/transcription jobs are processed correctly.
 def dlq_for_queue(queue: str) -> str:
-    if QUEUE_MODE == "both":
-        if queue == CLOUD_QUEUE_NAME:
-            return CLOUD_DLQ_NAME
-        if queue == LOCAL_QUEUE_NAME:
-            return LOCAL_DLQ_NAME
-    if QUEUE_MODE == "partitioned":
-        if queue == OCR_QUEUE_NAME:
-            return OCR_DLQ_NAME
-        if queue == TRANSCRIPTION_QUEUE_NAME:
-            return TRANSCRIPTION_DLQ_NAME
-    return DLQ_NAME
+    return _DLQ_MAP.get(queue, DLQ_NAME)
 
 
 # User value: routes work so user OCR/transcription jobs are processed correctly.
 def queue_source_label(queue: str) -> str:
-    if QUEUE_MODE == "both":
-        if queue == CLOUD_QUEUE_NAME:
-            return "CLOUD"
-        if queue == LOCAL_QUEUE_NAME:
-            return "LOCAL"
-        return "UNKNOWN"
-    if QUEUE_MODE == "partitioned":
-        if queue == OCR_QUEUE_NAME:
-            return "OCR"
-        if queue == TRANSCRIPTION_QUEUE_NAME:
-            return "TRANSCRIPTION"
-        return "UNKNOWN"
-    return "SINGLE"
+    return _SOURCE_MAP.get(queue, _DEFAULT_SOURCE)
 
 
 # User value: supports _job_type so the OCR/transcription journey stays clear and reliable.
 def _job_type(job: dict) -> str:
-    return str(job.get("job_type") or job.get("type") or "").upper()
+    raw = job.get("job_type") or job.get("type")
+    if not raw:
+        return ""
+    if isinstance(raw, str):
+        return _JOB_TYPE_UPPER.get(raw) or raw.upper()
+    return str(raw).upper()
 
 
 # User value: supports inflight_limit_for so the OCR/transcription journey stays clear and reliable.
@@ -192,6 +266,43 @@ def inflight_set_key(job_type: str) -> str:
     return f"worker:inflight:{jt}"
 
 
+# User value: names the wake-up list that tells waiting workers an inflight slot was released.
+def capacity_signal_key(job_type: str) -> str:
+    jt = job_type if job_type in {"OCR", "TRANSCRIPTION"} else "OTHER"
+    return f"worker:capacity:{jt}"
+
+
+# User value: frees an inflight slot and wakes a waiting worker so queued jobs start without a fixed delay.
+def release_inflight_slot(r, job_type: str, job_id: str) -> None:
+    signal_key = capacity_signal_key(job_type)
+    pipe = r.pipeline(transaction=False)
+    pipe.srem(inflight_set_key(job_type), job_id)
+    pipe.lpush(signal_key, job_id)
+    pipe.ltrim(signal_key, 0, max(1, inflight_limit_for(job_type)) - 1)
+    pipe.expire(signal_key, INFLIGHT_CAPACITY_SIGNAL_TTL_SEC)
+    pipe.execute()
+
+
+# Release tokens outlive idle periods, so a popped token only counts when
+# the inflight set really has room; stale ones are skipped without a requeue.
+# User value: waits for a released inflight slot instead of sleeping blindly, capped by the requeue backoff.
+def wait_for_inflight_capacity(r, job_type: str, timeout: float, limit: int) -> bool:
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if r.brpop([capacity_signal_key(job_type)], timeout=remaining) is None:
+                return False
+            if int(r.scard(inflight_set_key(job_type)) or 0) < limit:
+                return True
+    except redis.exceptions.RedisError as e:
+        logger.warning("inflight_capacity_wait_failed type=%s error=%s", job_type, e)
+        time.sleep(max(0.0, deadline - time.monotonic()))
+        return False
+
+
 # User value: prevents hot requeue loops so queued jobs do not spin endlessly under inflight pressure.
 def next_requeue_delay(job_id: str) -> tuple[float, int]:
     hits = int(_requeue_hits.get(job_id, 0)) + 1
@@ -202,6 +313,12 @@ def next_requeue_delay(job_id: str) -> tuple[float, int]:
     return round(delay + jitter, 3), hits
 
 
+# User value: spreads retries of failed jobs so they do not hit a recovering backend all at once.
+def retry_backoff_for(attempt: int) -> float:
+    base = _RETRY_BACKOFFS[min(max(0, attempt - 1), len(_RETRY_BACKOFFS) - 1)]
+    return base + random.uniform(0.0, base * _RETRY_BACKOFF_JITTER_RATIO)
+
+
 # User value: clears per-job backoff state when a job proceeds or exits so future jobs are not penalized.
 def clear_requeue_state(job_id: str) -> None:
     _requeue_hits.pop(job_id, None)
@@ -209,9 +326,9 @@ def clear_requeue_state(job_id: str) -> None:
 
 # User value: cleans stale inflight entries so real queued jobs can start instead of waiting forever.
 def prune_stale_inflight_markers(r, inflight_key: str) -> int:
-    now = time.time()
-    last = float(_last_inflight_sweep_ts.get(inflight_key, 0.0))
-    if (now - last) < max(1, INFLIGHT_STALE_SWEEP_INTERVAL_SEC):
+    now = time.monotonic()
+    last = _last_inflight_sweep_ts.get(inflight_key)
+    if last is not None and (now - last) < max(1, INFLIGHT_STALE_SWEEP_INTERVAL_SEC):
         return int(r.scard(inflight_key) or 0)
     _last_inflight_sweep_ts[inflight_key] = now
 
@@ -221,15 +338,25 @@ def prune_stale_inflight_markers(r, inflight_key: str) -> int:
     except Exception:
         members = []
 
-    for member_job_id in members:
+    try:
+        pipe = r.pipeline(transaction=False)
+        for member_job_id in members:
+            pipe.exists(f"job_status:{member_job_id}")
+            pipe.hget(f"job_status:{member_job_id}", "status")
+        replies = pipe.execute()
+    except Exception:
+        replies = []
+
+    stale = [
+        member_job_id
+        for member_job_id, exists, status in zip(members, replies[::2], replies[1::2])
+        if not exists or str(status or "").upper() in _TERMINAL_STATUSES
+    ]
+    if stale:
         try:
-            data = r.hgetall(f"job_status:{member_job_id}") or {}
-            status = str(data.get("status") or "").upper()
-            if not data or status in _TERMINAL_STATUSES:
-                r.srem(inflight_key, member_job_id)
-                removed += 1
+            removed = int(r.srem(inflight_key, *stale) or 0)
         except Exception:
-            continue
+            removed = 0
 
     if removed > 0:
         logger.warning("inflight_stale_cleanup key=%s removed=%s", inflight_key, removed)
@@ -239,29 +366,43 @@ def prune_stale_inflight_markers(r, inflight_key: str) -> int:
 # =========================================================
 # REDIS CONNECT
 # =========================================================
+# User value: opens the queue connection; it returns raw bytes so job payloads skip str decoding.
+# Only the main loop uses it, so it holds one dedicated socket instead of a pool.
+def connect_queue_redis():
+    return connect_redis(decode_responses=False, client_name="doc-worker-queue", single_connection=True)
+
+
 # User value: supports connect_redis so the OCR/transcription journey stays clear and reliable.
-def connect_redis():
-    logger.info("Connecting to Redis")
+def connect_redis(*, decode_responses: bool = True, client_name: str = "doc-worker", single_connection: bool = False):
+    logger.info("Connecting to Redis client_name=%s", client_name)
     r = redis.from_url(
         REDIS_URL,
-        decode_responses=True,
+        decode_responses=decode_responses,
         socket_keepalive=True,
         socket_connect_timeout=2,
         socket_timeout=15,
         retry_on_timeout=True,
         health_check_interval=30,
+        single_connection_client=single_connection,
     )
 
     r.ping()
 
     try:
-        r.client_setname("doc-worker")
-        logger.info("Redis client name set to doc-worker")
+        r.client_setname(client_name)
+        logger.info("Redis client name set to %s", client_name)
     except Exception:
         logger.warning("Could not set Redis client name")
 
+    # Keep the worker's long-lived connections out of client eviction under
+    # maxmemory-clients pressure; needs Redis 7+, so failures are non-fatal.
     try:
-        logger.info(f"Redis client_id={r.client_id()}")
+        r.client_no_evict("ON")
+    except Exception as e:
+        logger.warning("Could not enable CLIENT NO-EVICT: %s", e)
+
+    try:
+        logger.info("Redis client_id=%s", r.client_id())
     except Exception:
         logger.warning("Could not fetch Redis client_id")
 
@@ -275,22 +416,36 @@ def connect_redis():
 # User value: supports log_redis_health so the OCR/transcription journey stays clear and reliable.
 def log_redis_health(r, prefix=""):
     try:
-        t0 = time.time()
+        t0 = time.monotonic_ns()
         pong = r.ping()
-        latency = int((time.time() - t0) * 1000)
-        logger.info(f"{prefix}Redis PING ok={pong} latency={latency}ms")
+        latency = (time.monotonic_ns() - t0) // 1_000_000
+        logger.info("%sRedis PING ok=%s latency=%sms", prefix, pong, latency)
     except Exception as e:
-        logger.error(f"{prefix}Redis PING FAILED: {e}")
+        logger.error("%sRedis PING FAILED: %s", prefix, e)
 
 
 # User value: routes work so user OCR/transcription jobs are processed correctly.
 def log_queue_depths(r):
-    for q in queue_targets():
-        try:
-            depth = r.llen(q)
-            logger.info(f"Queue depth {q}={depth}")
-        except Exception as e:
-            logger.error(f"Failed to read queue depth for {q}: {e}")
+    targets = queue_targets()
+    try:
+        depths = queue_depths(r, targets)
+    except Exception as e:
+        logger.error("Failed to read queue depths for %s: %s", targets, e)
+        return
+    for q in targets:
+        logger.info("Queue depth %s=%s", q, depths[q])
+
+
+# User value: limits per-job PING/LLEN diagnostics to one per interval so busy workers spend time on jobs.
+def health_log_due() -> bool:
+    global _next_health_log_ts
+    if logger.isEnabledFor(logging.DEBUG):
+        return True
+    now = time.monotonic()
+    if now < _next_health_log_ts:
+        return False
+    _next_health_log_ts = now + max(0, WORKER_HEALTH_LOG_INTERVAL_SEC)
+    return True
 
 
 # User value: records dequeue streak so scheduler can prevent one queue from starving another.
@@ -303,12 +458,20 @@ def mark_dequeue(queue: str) -> None:
         _last_dequeue_streak = 1
 
 
-# User value: reads queue depth safely so scheduler can make fair dequeue decisions.
-def safe_queue_depth(r, queue: str) -> int:
+# User value: reads every queue depth in one pipelined round trip.
+def queue_depths(r, targets: list[str]) -> dict[str, int]:
+    pipe = r.pipeline(transaction=False)
+    for q in targets:
+        pipe.llen(q)
+    return {q: int(depth or 0) for q, depth in zip(targets, pipe.execute())}
+
+
+# User value: reads queue depths safely so scheduler can make fair dequeue decisions.
+def safe_queue_depths(r, targets: list[str]) -> dict[str, int]:
     try:
-        return int(r.llen(queue) or 0)
+        return queue_depths(r, targets)
     except Exception:
-        return 0
+        return {q: 0 for q in targets}
 
 
 # User value: exposes queue orchestration snapshot for consistent logs/API diagnostics.
@@ -318,7 +481,7 @@ def scheduler_snapshot(r, targets: list[str]) -> dict:
         "max_consecutive": max(1, WORKER_SCHEDULER_MAX_CONSECUTIVE),
         "last_queue": _last_dequeue_queue,
         "last_streak": int(_last_dequeue_streak),
-        "depths": {q: safe_queue_depth(r, q) for q in targets},
+        "depths": safe_queue_depths(r, targets),
     }
 
 
@@ -332,7 +495,7 @@ def scheduled_queue_targets(r) -> list[str]:
     if policy == "fifo":
         return targets
 
-    depths = {q: safe_queue_depth(r, q) for q in targets}
+    depths = safe_queue_depths(r, targets)
     active_depth_min = max(0, WORKER_SCHEDULER_ACTIVE_DEPTH_MIN)
     active = [q for q in targets if depths.get(q, 0) >= max(1, active_depth_min)]
     if not active:
@@ -370,508 +533,749 @@ def scheduled_queue_targets(r) -> list[str]:
     return sorted(targets, key=lambda q: depths.get(q, 0), reverse=True)
 
 
-# =========================================================
-# STARTUP
-# =========================================================
-logger.info("Starting worker")
-logger.info(f"REDIS_URL={REDIS_URL}")
-logger.info(f"QUEUE_MODE={QUEUE_MODE}")
-logger.info(f"QUEUE_TARGETS={queue_targets()}")
-logger.info(
-    "WORKER_CONCURRENCY_LIMITS ocr=%s transcription=%s retry_budget_transient=%s retry_budget_media=%s retry_budget_default=%s",
-    WORKER_MAX_INFLIGHT_OCR,
-    WORKER_MAX_INFLIGHT_TRANSCRIPTION,
-    RETRY_BUDGET_TRANSIENT,
-    RETRY_BUDGET_MEDIA,
-    RETRY_BUDGET_DEFAULT,
-)
-logger.info(
-    "WORKER_SCHEDULER policy=%s max_consecutive=%s active_depth_min=%s",
-    WORKER_SCHEDULER_POLICY,
-    max(1, WORKER_SCHEDULER_MAX_CONSECUTIVE),
-    max(0, WORKER_SCHEDULER_ACTIVE_DEPTH_MIN),
-)
-worker_identity = f"{socket.gethostname()}:{os.getpid()}"
-logger.info("WORKER_ID=%s", worker_identity)
+# User value: names the list holding this worker's unfinished jobs from one queue, so none are lost on a crash.
+def processing_list_key(queue: str) -> str:
+    return f"processing:{WORKER_PROCESSING_ID}:{queue}"
 
-r = connect_redis()
 
-last_job_ts = time.time()
+# User value: parks popped payloads until their jobs finish so a crashed worker's jobs can be recovered.
+def _park_popped(r, queue: bytes, items: list[bytes]) -> None:
+    if WORKER_PROCESSING_LIST and items:
+        r.lpush(processing_list_key(queue.decode("utf-8")), *items)
 
-# =========================================================
-# MAIN LOOP
-# =========================================================
-while True:
-    try:
-        idle_for = int(time.time() - last_job_ts)
 
-        if idle_for > MAX_IDLE_BEFORE_RECONNECT:
-            logger.warning(f"Worker idle for {idle_for}s — reconnecting Redis")
-            try:
-                r.close()
-            except Exception:
-                pass
-            r = connect_redis()
-            last_job_ts = time.time()
-
-        targets = scheduled_queue_targets(r)
-        snapshot = scheduler_snapshot(r, queue_targets())
-        logger.info(
-            "Entering BRPOP wait targets=%s scheduler_policy=%s streak=%s last_queue=%s depths=%s",
-            targets,
-            snapshot["policy"],
-            snapshot["last_streak"],
-            snapshot["last_queue"],
-            snapshot["depths"],
-        )
+# User value: pulls up to WORKER_PREFETCH_COUNT queued jobs per round trip so bursts drain faster.
+# free_slots caps the batch so popped jobs never wait locally for a job thread.
+def pop_queued_job(r, targets: list[str], timeout: int, free_slots: int = 1):
+    global _blmpop_supported
+    count = max(1, min(WORKER_PREFETCH_COUNT, free_slots))
+    if count > 1 and _blmpop_supported:
+        try:
+            result = r.blmpop(timeout, len(targets), *targets, direction="RIGHT", count=count)
+        except redis.exceptions.ResponseError as e:
+            _blmpop_supported = False
+            logger.warning("blmpop_unsupported action=fallback_brpop error=%s", e)
+        else:
+            if not result:
+                return None
+            queue, items = result
+            _park_popped(r, queue, items)
+            _prefetched_jobs.extend((queue, job_raw) for job_raw in items)
+            return _prefetched_jobs.popleft()
+    if WORKER_PROCESSING_LIST and len(targets) == 1:
+        # Single source: move atomically so the payload is never only in memory.
+        job_raw = r.blmove(targets[0], processing_list_key(targets[0]), timeout, "RIGHT", "LEFT")
+        return None if job_raw is None else (targets[0].encode("utf-8"), job_raw)
+    result = r.brpop(targets, timeout=timeout)
+    if result:
+        _park_popped(r, result[0], [result[1]])
+    return result
+
+
+# User value: drops a finished job from the processing list once its outcome is recorded.
+def ack_job(r, queue: str, job_raw: bytes) -> None:
+    if WORKER_PROCESSING_LIST:
+        r.lrem(processing_list_key(queue), 1, job_raw)
+
+
+# User value: puts a job back on its queue and out of the processing list in one atomic step.
+def requeue_job(r, queue: str, job_raw: bytes) -> None:
+    if not WORKER_PROCESSING_LIST:
+        r.rpush(queue, job_raw)
+        return
+    pipe = r.pipeline(transaction=True)
+    pipe.rpush(queue, job_raw)
+    pipe.lrem(processing_list_key(queue), 1, job_raw)
+    pipe.execute()
+
+
+# User value: moves every parked payload in one processing list back to its queue.
+# Parked payloads are newest-left, and the queue pops from the right, so
+# moving LEFT to RIGHT leaves the oldest recovered job next in line.
+def _drain_processing_list(r, key: str, queue: str) -> int:
+    moved = 0
+    while r.lmove(key, queue, "LEFT", "RIGHT") is not None:
+        moved += 1
+    return moved
+
+
+# User value: returns jobs left unfinished by a previous run of this worker to their queues.
+def recover_processing_lists(r, targets: list[str]) -> int:
+    if not WORKER_PROCESSING_LIST:
+        return 0
+    recovered = 0
+    for q in targets:
+        recovered += _drain_processing_list(r, processing_list_key(q), q)
+    if recovered:
+        logger.warning("Recovered %s unfinished job(s) from processing lists id=%s", recovered, WORKER_PROCESSING_ID)
+    return recovered
 
-        start_wait = time.time()
+
+# User value: names the liveness key that keeps other workers from taking over this worker's jobs.
+def processing_owner_key(worker_id: str) -> str:
+    return f"processing_owner:{worker_id}"
+
+
+# User value: keeps this worker's liveness key fresh while it runs, even when every job thread is busy.
+def _keep_processing_owner_alive(r) -> None:
+    while True:
         try:
-            result = r.brpop(targets, timeout=BRPOP_TIMEOUT)
-        except (socket.timeout, redis.exceptions.TimeoutError, redis.exceptions.ConnectionError) as e:
-            waited = round(time.time() - start_wait, 2)
-            logger.warning(f"Redis socket timeout after {waited}s — reconnecting ({e})")
-            try:
-                r.close()
-            except Exception:
-                pass
-            r = connect_redis()
-            continue
-
-        waited = round(time.time() - start_wait, 2)
-
-        if result is None:
-            logger.info(f"BRPOP timeout after {waited}s (idle)")
-            log_redis_health(r, prefix="[timeout] ")
-            time.sleep(0.1)
-            continue
-
-        queue, job_raw = result
-        active_dlq = dlq_for_queue(queue)
-        source_label = queue_source_label(queue)
-        last_job_ts = time.time()
-
-        logger.info(f"BRPOP returned after {waited}s from queue={queue}")
-        mark_dequeue(queue)
-        logger.info(f"Queue source classification={source_label}")
-        logger.info(f"DLQ target for this job={active_dlq}")
-        log_queue_depths(r)
-        log_redis_health(r, prefix="[job-received] ")
-
-        job = json.loads(job_raw)
-        job_id = job.get("job_id", "UNKNOWN")
-        request_id = str(job.get("request_id") or "").strip()
-        key = f"job_status:{job_id}"
-
-        logger.info(f"Parsed job_id={job_id}")
-        if request_id:
-            logger.info(f"Parsed request_id={request_id}")
-        logger.info(f"Job payload keys={list(job.keys())}")
-        job_type = _job_type(job)
-        current_attempt = int(job.get("attempts", 0) or 0)
-        max_allowed = inflight_limit_for(job_type)
-        inflight_key = inflight_set_key(job_type)
-        if max_allowed <= 0:
-            delay, hits = next_requeue_delay(job_id)
-            logger.warning(
-                "Job %s blocked by zero inflight limit for type=%s queue=%s; requeueing delay=%.2fs hits=%s",
-                job_id,
-                job_type,
-                queue,
-                delay,
-                hits,
-            )
-            r.rpush(queue, job_raw)
-            time.sleep(delay)
-            continue
+            r.set(processing_owner_key(WORKER_PROCESSING_ID), worker_identity, ex=PROCESSING_OWNER_TTL_SEC)
+        except Exception as exc:
+            logger.warning("processing_owner_refresh_failed id=%s error=%s", WORKER_PROCESSING_ID, exc)
+        time.sleep(PROCESSING_OWNER_REFRESH_SEC)
+
+
+# User value: starts the liveness heartbeat so this worker's parked jobs are only recovered once it is gone.
+def start_processing_owner_heartbeat(r) -> threading.Thread | None:
+    if not WORKER_PROCESSING_LIST:
+        return None
+    r.set(processing_owner_key(WORKER_PROCESSING_ID), worker_identity, ex=PROCESSING_OWNER_TTL_SEC)
+    thread = threading.Thread(
+        target=_keep_processing_owner_alive,
+        args=(r,),
+        name="processing-owner",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+# User value: requeues jobs parked by workers that died or were redeployed under a different id.
+def recover_orphaned_processing_lists(r, targets: list[str]) -> int:
+    if not WORKER_PROCESSING_LIST:
+        return 0
+    prefix = "processing:"
+    recovered = 0
+    for raw_key in r.scan_iter(match=f"{prefix}*", count=100):
+        key = raw_key.decode("utf-8") if isinstance(raw_key, bytes) else raw_key
+        for q in targets:
+            if not key.endswith(f":{q}"):
+                continue
+            owner = key[len(prefix):-len(q) - 1]
+            if owner and owner != WORKER_PROCESSING_ID and not r.exists(processing_owner_key(owner)):
+                moved = _drain_processing_list(r, key, q)
+                if moved:
+                    logger.warning("Recovered %s orphaned job(s) from %s", moved, key)
+                recovered += moved
+            break
+    return recovered
+
+
+# User value: runs the orphaned-list sweep at most once per interval from the main loop.
+def orphan_sweep_due() -> bool:
+    global _next_orphan_sweep_ts
+    now = time.monotonic()
+    if now < _next_orphan_sweep_ts:
+        return False
+    _next_orphan_sweep_ts = now + PROCESSING_ORPHAN_SWEEP_INTERVAL_SEC
+    return True
+
+
+# =========================================================
+# JOB EXECUTION
+# =========================================================
+@dataclass(frozen=True)
+class JobCtx:
+    job: dict
+    job_raw: bytes
+    job_id: str
+    request_id: str
+    key: str
+    queue: str
+    active_dlq: str
+    source_label: str
+    job_type: str
+    current_attempt: int
+    metric_labels: tuple[tuple[str, str], ...]
+
+
+# User value: surfaces unexpected errors from job threads so no failure disappears silently.
+def _log_job_future(future: Future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Job thread raised unexpectedly: %s", exc, exc_info=exc)
+
+
+# User value: runs one admitted job end to end so OCR/transcription work can overlap the next queue pop.
+# The job leaves the processing list only once its outcome is recorded; if
+# the outcome write fails it stays parked and is recovered on restart.
+def _process_job(r, ctx: JobCtx) -> None:
+    try:
+        _run_job(r, ctx)
+        recorded = True
+    except JobCancelledError:
+        recorded = _handle_job_cancelled(r, ctx)
+    except Exception as e:
+        recorded = _handle_job_failure(r, ctx, e)
+    if not recorded:
+        logger.warning("Outcome not recorded for job_id=%s; leaving it in the processing list for recovery", ctx.job_id)
+        return
+    try:
+        ack_job(r, ctx.queue, ctx.job_raw)
+    except Exception:
+        logger.warning("Failed to ack job_id=%s from processing list", ctx.job_id)
+
+
+# User value: moves a job through PROCESSING, dispatch and COMPLETED so users see accurate progress.
+def _run_job(r, ctx: JobCtx) -> None:
+    job, job_id, request_id, key = ctx.job, ctx.job_id, ctx.request_id, ctx.key
+    now = utc_now_iso().encode()
+    claim, prev_status = claim_for_processing(
+        r,
+        key=key,
+        cancelled_argv=(*_CANCELLED_ARGV, b"request_id", request_id.encode(), b"updated_at", now),
+        processing_argv=(*_PROCESSING_ARGV, b"request_id", request_id.encode(), b"updated_at", now),
+        context="WORKER_PROCESSING_START",
+        request_id=request_id,
+    )
+    if claim in ("CANCELLED", "BLOCKED_CANCELLED"):
+        logger.info("Skipping cancelled job_id=%s", job_id)
+        if claim == "BLOCKED_CANCELLED":
+            logger.warning("Skip-cancel update blocked job_id=%s from=%s", job_id, prev_status)
         try:
-            inflight_now = int(r.scard(inflight_key) or 0)
+            release_inflight_slot(r, ctx.job_type, job_id)
         except Exception:
-            inflight_now = 0
-        if inflight_now >= max_allowed:
-            inflight_now = prune_stale_inflight_markers(r, inflight_key)
-        if inflight_now >= max_allowed:
-            delay, hits = next_requeue_delay(job_id)
-            logger.info(
-                "inflight_limit_hit type=%s limit=%s current=%s queue=%s job_id=%s requeue=true delay=%.2fs hits=%s",
-                job_type,
-                max_allowed,
-                inflight_now,
-                queue,
-                job_id,
-                delay,
-                hits,
-            )
-            r.rpush(queue, job_raw)
-            time.sleep(delay)
-            continue
+            logger.warning("Failed to clear inflight marker for skipped job_id=%s", job_id)
         clear_requeue_state(job_id)
-        r.sadd(inflight_key, job_id)
-        r.expire(inflight_key, 86400)
-        incr("worker_jobs_received_total", queue=queue, source=source_label, job_type=job.get("job_type", "UNKNOWN"))
-        log_stage_event(
-            job_id=job_id,
+        return
+    if claim != "PROCESSING":
+        raise RuntimeError(f"Invalid status transition to PROCESSING from {prev_status or 'NONE'}")
+
+    logger.info("Dispatch START job_id=%s request_id=%s", job_id, request_id)
+    log_stage_event(job_id=job_id, request_id=request_id, stage="DISPATCH", event="STARTED")
+    dispatch_start = time.monotonic()
+
+    output = dispatch(job)
+
+    duration = round(time.monotonic() - dispatch_start, 2)
+    observe_ms_labels("worker_dispatch_latency_ms", duration * 1000.0, ctx.metric_labels)
+    logger.info("Dispatch END job_id=%s request_id=%s duration=%ss output=%s", job_id, request_id, duration, output)
+    log_stage_event(
+        job_id=job_id,
+        request_id=request_id,
+        stage="DISPATCH",
+        event="COMPLETED",
+        duration_sec=duration,
+    )
+
+    outcome, prev_status = finalize_completed(
+        r,
+        key=key,
+        default_stage="Completed",
+        completed_argv=(
+            *_COMPLETED_ARGV,
+            b"request_id", request_id.encode(),
+            b"updated_at", utc_now_iso().encode(),
+            b"duration_sec", repr(duration).encode(),
+        ),
+        context="WORKER_COMPLETE",
+        request_id=request_id,
+    )
+    if outcome == "BLOCKED":
+        logger.warning("Completion status update blocked job_id=%s from=%s", job_id, prev_status)
+    logger.info("Worker finished job %s request_id=%s", job_id, request_id)
+    try:
+        release_inflight_slot(r, ctx.job_type, job_id)
+    except Exception:
+        logger.warning("Failed to clear inflight marker job_id=%s job_type=%s", job_id, ctx.job_type)
+    clear_requeue_state(job_id)
+    incr_labels("worker_jobs_completed_total", ctx.metric_labels)
+    log_stage_event(job_id=job_id, request_id=request_id, stage="JOB_EXECUTION", event="COMPLETED")
+
+
+# User value: marks a job cancelled mid-run and frees its slot so the next job can start.
+def _handle_job_cancelled(r, ctx: JobCtx) -> bool:
+    job_id, request_id = ctx.job_id, ctx.request_id
+    logger.info("Job %s cancelled during processing", job_id)
+    try:
+        release_inflight_slot(r, ctx.job_type, job_id)
+    except Exception:
+        logger.warning("Failed to clear inflight marker for cancelled job_id=%s", job_id)
+    clear_requeue_state(job_id)
+    incr("worker_jobs_cancelled_total", queue=ctx.queue)
+    log_stage_event(job_id=job_id, request_id=request_id, stage="JOB_EXECUTION", event="CANCELLED")
+    try:
+        ok, prev_status, _ = guarded_hset(
+            r,
+            key=ctx.key,
+            mapping={
+                **_CANCELLED_STATUS_TEMPLATE,
+                "request_id": request_id,
+                "progress": 100,
+                "updated_at": utc_now_iso(),
+            },
+            context="WORKER_CANCELLED_EXCEPTION",
             request_id=request_id,
-            stage="JOB_RECEIVED",
-            event="STARTED",
-            queue=queue,
-            source_label=source_label,
         )
+        if not ok:
+            logger.warning("Cancelled status update blocked job_id=%s from=%s", job_id, prev_status)
+        return True
+    except Exception:
+        logger.exception("Failed to mark job cancelled")
+        return False
+
+
+# User value: records why and when a job was retried or dead-lettered so users can follow its recovery.
+def _recovery_trace(action: str, recovery: dict) -> str:
+    return json_codec.dumps(
+        [
+            {
+                "action": action,
+                "reason": str(recovery["recovery_reason"]),
+                "attempt": int(recovery["recovery_attempt"]),
+                "max_attempts": int(recovery["recovery_max_attempts"]),
+            }
+        ]
+    )
+
+
+# User value: retries or dead-letters a failed job with a clear error so users know what happened.
+# Returns False when the retry, DLQ or status write did not go through.
+def _handle_job_failure(r, ctx: JobCtx, e: Exception) -> bool:
+    job, job_id, request_id, key = ctx.job, ctx.job_id, ctx.request_id, ctx.key
+    logger.exception("Worker error")
+    try:
+        release_inflight_slot(r, ctx.job_type, job_id)
+    except Exception:
+        logger.warning("Failed to clear inflight marker for failed job_id=%s", job_id)
+    clear_requeue_state(job_id)
+    incr(
+        "worker_jobs_failed_total",
+        queue=ctx.queue,
+        job_type=job.get("job_type", "UNKNOWN"),
+    )
+    log_stage_event(
+        job_id=job_id,
+        request_id=request_id,
+        stage="JOB_EXECUTION",
+        event="FAILED",
+        error=f"{e.__class__.__name__}: {e}",
+    )
 
-        current = r.hgetall(key)
-        if current and (current.get("cancel_requested") == "1" or (current.get("status") or "").upper() == "CANCELLED"):
-            logger.info(f"Skipping cancelled job_id={job_id}")
+    try:
+        if is_cancelled(job_id, r=r):
+            ok, prev_status, _ = guarded_hset(
+                r,
+                key=key,
+                mapping={**_CANCELLED_STATUS_TEMPLATE, "request_id": request_id, "updated_at": utc_now_iso()},
+                context="WORKER_ERROR_CANCELLED",
+                request_id=request_id,
+            )
+            if not ok:
+                logger.warning("Post-error cancelled update blocked job_id=%s from=%s", job_id, prev_status)
+            logger.info("Job %s cancelled (post-error path)", job_id)
+            return True
+        error_code, error_message = classify_error(e)
+        error_detail = f"{e.__class__.__name__}: {e}"
+        failed_stage = ((r.hget(key, "stage") if key else None) or "Processing failed").strip()
+        recovery = decide_recovery_action(
+            error_code=error_code,
+            attempts=ctx.current_attempt,
+            budget_transient=RETRY_BUDGET_TRANSIENT,
+            budget_media=RETRY_BUDGET_MEDIA,
+            budget_default=RETRY_BUDGET_DEFAULT,
+        )
+        retry_allowed = bool(recovery["retry_allowed"])
+        retry_budget = int(recovery["recovery_max_attempts"])
+        if retry_allowed:
+            next_attempt = int(recovery["recovery_attempt"])
+            backoff = retry_backoff_for(next_attempt)
+            recovery_trace = _recovery_trace(str(recovery["recovery_action"]), recovery)
             ok, prev_status, _ = guarded_hset(
                 r,
                 key=key,
                 mapping={
-                    "contract_version": CONTRACT_VERSION,
+                    **_RETRY_QUEUED_STATUS_TEMPLATE,
                     "request_id": request_id,
-                    "status": "CANCELLED",
-                    "stage": "Cancelled by user",
-                    "updated_at": datetime.utcnow().isoformat(),
-                    "error_code": "CANCELLED_BY_USER",
-                    "error_message": "Job was cancelled by user.",
-                    "error_detail": "",
-                    "error": "Job was cancelled by user.",
+                    "stage": f"Retry scheduled ({next_attempt}/{retry_budget})",
+                    "updated_at": utc_now_iso(),
+                    "error_code": error_code,
+                    "error_message": error_message,
+                    "error_detail": error_detail,
+                    "error": error_message,
+                    "recovery_action": str(recovery["recovery_action"]),
+                    "recovery_reason": str(recovery["recovery_reason"]),
+                    "recovery_attempt": str(recovery["recovery_attempt"]),
+                    "recovery_max_attempts": str(recovery["recovery_max_attempts"]),
+                    "recovery_trace": recovery_trace,
                 },
-                context="WORKER_SKIP_CANCELLED",
+                context="WORKER_RETRY_REQUEUE",
                 request_id=request_id,
             )
             if not ok:
-                logger.warning("Skip-cancel update blocked job_id=%s from=%s", job_id, prev_status)
-            continue
+                logger.warning("Retry status update blocked job_id=%s from=%s", job_id, prev_status)
+            retry_payload = dict(job)
+            retry_payload["attempts"] = next_attempt
+            retry_payload["max_attempts"] = retry_budget
+            retry_payload["recovery_action"] = str(recovery["recovery_action"])
+            retry_payload["recovery_reason"] = str(recovery["recovery_reason"])
+            retry_payload["recovery_attempt"] = str(recovery["recovery_attempt"])
+            retry_payload["recovery_max_attempts"] = str(recovery["recovery_max_attempts"])
+            retry_payload["recovery_trace"] = recovery_trace
+            logger.warning(
+                "Retrying job_id=%s request_id=%s error_code=%s attempt=%s/%s backoff_sec=%.2f",
+                job_id,
+                request_id,
+                error_code,
+                next_attempt,
+                retry_budget,
+                backoff,
+            )
+            time.sleep(backoff)
+            r.rpush(ctx.queue or QUEUE_NAME, json_codec.dumps_bytes(retry_payload))
+            return True
+        recovery_trace = _recovery_trace("fail_fast_dlq", recovery)
         ok, prev_status, _ = guarded_hset(
             r,
             key=key,
             mapping={
-                "contract_version": CONTRACT_VERSION,
+                **_FAILED_STATUS_TEMPLATE,
                 "request_id": request_id,
-                "status": "PROCESSING",
-                "stage": "Processing started",
-                "progress": 1,
-                "updated_at": datetime.utcnow().isoformat(),
+                "error_code": error_code,
+                "error_message": error_message,
+                "error_detail": error_detail,
+                "error": error_message,
+                "recovery_reason": str(recovery["recovery_reason"]),
+                "recovery_attempt": str(recovery["recovery_attempt"]),
+                "recovery_max_attempts": str(recovery["recovery_max_attempts"]),
+                "recovery_trace": recovery_trace,
+                "updated_at": utc_now_iso(),
             },
-            context="WORKER_PROCESSING_START",
+            context="WORKER_ERROR_FAILED",
             request_id=request_id,
         )
         if not ok:
-            raise RuntimeError(f"Invalid status transition to PROCESSING from {prev_status or 'NONE'}")
-
-        logger.info(f"Dispatch START job_id={job_id} request_id={request_id}")
-        log_stage_event(job_id=job_id, request_id=request_id, stage="DISPATCH", event="STARTED")
-        dispatch_start = time.time()
-
-        output = dispatch(job)
-
-        duration = round(time.time() - dispatch_start, 2)
-        observe_ms(
-            "worker_dispatch_latency_ms",
-            duration * 1000.0,
-            queue=queue,
-            source=source_label,
-            job_type=job.get("job_type", "UNKNOWN"),
+            logger.warning("Failed status update blocked job_id=%s from=%s", job_id, prev_status)
+        target_dlq = ctx.active_dlq or DLQ_NAME
+        job["recovery_action"] = "fail_fast_dlq"
+        job["recovery_reason"] = str(recovery["recovery_reason"])
+        job["recovery_attempt"] = str(recovery["recovery_attempt"])
+        job["recovery_max_attempts"] = str(recovery["recovery_max_attempts"])
+        job["recovery_trace"] = recovery_trace
+        dlq_payload = build_dead_letter_entry(
+            job=job,
+            queue_name=ctx.queue or "UNKNOWN",
+            dlq_name=target_dlq,
+            source_label=ctx.source_label or "UNKNOWN",
+            error_code=error_code,
+            error_message=error_message,
+            error_detail=error_detail,
+            failed_stage=failed_stage,
+            worker_id=worker_identity,
         )
-        logger.info(f"Dispatch END job_id={job_id} request_id={request_id} duration={duration}s output={output}")
         log_stage_event(
             job_id=job_id,
             request_id=request_id,
-            stage="DISPATCH",
+            stage="DLQ_ENQUEUE",
+            event="STARTED",
+            dlq_name=target_dlq,
+            error_code=error_code,
+        )
+        r.lpush(target_dlq, json_codec.dumps_bytes(dlq_payload))
+        log_stage_event(
+            job_id=job_id,
+            request_id=request_id,
+            stage="DLQ_ENQUEUE",
             event="COMPLETED",
-            duration_sec=duration,
+            dlq_name=target_dlq,
+            error_code=error_code,
+            attempts=dlq_payload.get("attempts"),
+            max_attempts=dlq_payload.get("max_attempts"),
+        )
+        logger.error(
+            "Job %s request_id=%s moved to DLQ=%s error_code=%s stage=%s detail=%s attempts=%s/%s",
+            job_id,
+            request_id,
+            target_dlq,
+            error_code,
+            failed_stage,
+            error_detail,
+            dlq_payload.get("attempts"),
+            dlq_payload.get("max_attempts"),
         )
+        return True
+    except Exception:
+        logger.exception("Failure during error handling")
+        return False
 
-        current = r.hgetall(key)
-        current_status = (current.get("status") or "").upper()
 
-        if current_status not in ("WAITING_APPROVAL", "APPROVED", "CANCELLED"):
-            ok, prev_status, _ = guarded_hset(
-                r,
-                key=key,
-                mapping={
-                    "contract_version": CONTRACT_VERSION,
-                    "request_id": request_id,
-                    "status": "COMPLETED",
-                    "stage": current.get("stage") or "Completed",
-                    "progress": 100,
-                    "updated_at": datetime.utcnow().isoformat(),
-                    "duration_sec": duration,
-                    "error_code": "",
-                    "error_message": "",
-                    "error_detail": "",
-                    "error": "",
-                },
-                context="WORKER_COMPLETE",
-                request_id=request_id,
-            )
-            if not ok:
-                logger.warning("Completion status update blocked job_id=%s from=%s", job_id, prev_status)
-        logger.info(f"Worker finished job {job_id} request_id={request_id}")
+# User value: builds a job context from a payload whose fields may be malformed, so admission errors can still be recorded.
+def _admission_ctx(job: dict, job_raw: bytes, queue: str) -> JobCtx:
+    try:
+        current_attempt = int(job.get("attempts", 0) or 0)
+    except (TypeError, ValueError):
+        current_attempt = 0
+    job_id = str(job.get("job_id", "UNKNOWN"))
+    return JobCtx(
+        job=job,
+        job_raw=job_raw,
+        job_id=job_id,
+        request_id=str(job.get("request_id") or "").strip(),
+        key=f"job_status:{job_id}",
+        queue=queue,
+        active_dlq=dlq_for_queue(queue),
+        source_label=queue_source_label(queue),
+        job_type=_job_type(job),
+        current_attempt=current_attempt,
+        metric_labels=(),
+    )
+
+
+# User value: retries jobs hit by a Redis blip while sending malformed payloads to FAILED/DLQ instead of looping on them.
+# Only transient Redis errors requeue the job; anything else (a non-numeric
+# attempts field, a job_id Redis cannot store) is a property of the payload
+# and goes through the normal retry budget and DLQ.
+def _handle_admission_error(r, r_block, ctx: JobCtx, e: Exception, *, admitted: bool) -> None:
+    if isinstance(e, REDIS_RETRYABLE):
         try:
-            r.srem(inflight_set_key(job_type), job_id)
+            if admitted:
+                release_inflight_slot(r, ctx.job_type, ctx.job_id)
+            requeue_job(r_block, ctx.queue, ctx.job_raw)
+            logger.warning("Requeued job_id=%s queue=%s after admission error", ctx.job_id, ctx.queue)
         except Exception:
-            logger.warning("Failed to clear inflight marker job_id=%s job_type=%s", job_id, job_type)
-        clear_requeue_state(job_id)
-        incr("worker_jobs_completed_total", queue=queue, source=source_label, job_type=job.get("job_type", "UNKNOWN"))
-        log_stage_event(job_id=job_id, request_id=request_id, stage="JOB_EXECUTION", event="COMPLETED")
-        time.sleep(0.1)
+            logger.exception("Failed to requeue job after admission error")
+        return
+    if not _handle_job_failure(r, ctx, e):
+        logger.warning("Outcome not recorded for job_id=%s; leaving it in the processing list for recovery", ctx.job_id)
+        return
+    try:
+        ack_job(r_block, ctx.queue, ctx.job_raw)
+    except Exception:
+        logger.warning("Failed to ack job_id=%s after admission error queue=%s", ctx.job_id, ctx.queue)
 
-    except JobCancelledError:
-        logger.info(f"Job {job_id} cancelled during processing")
+
+# =========================================================
+# STARTUP
+# =========================================================
+worker_identity = f"{socket.gethostname()}:{os.getpid()}"
+_LABELS_BY_QUEUE = {q: (("queue", q), ("source", queue_source_label(q))) for q in queue_targets()}
+
+
+# User value: starts the worker so queued OCR/transcription jobs get picked up and processed.
+def main() -> None:
+    global dispatch, _next_heartbeat_ts
+    level_name = os.getenv("LOG_LEVEL", "INFO").upper()
+    level = getattr(logging, level_name, logging.INFO)
+    configure_json_logging(service="doc-transcribe-worker", level=level)
+    validate_startup_env()
+    from worker.dispatcher import dispatch
+
+    logger.info(
+        "worker_gcp_config project_id=%s bucket=%s credentials_path=%s credentials_json_set=%s",
+        os.getenv("GCP_PROJECT_ID", ""),
+        os.getenv("GCS_BUCKET_NAME", ""),
+        os.getenv("GOOGLE_APPLICATION_CREDENTIALS", ""),
+        "1" if os.getenv("GOOGLE_APPLICATION_CREDENTIALS_JSON") else "0",
+    )
+    logger.info("gcloud_active_account=%s", _detect_gcloud_account())
+    logger.info("Starting worker")
+    logger.info(f"REDIS_URL={REDIS_URL}")
+    logger.info(f"QUEUE_MODE={QUEUE_MODE}")
+    logger.info(f"QUEUE_TARGETS={queue_targets()}")
+    logger.info("WORKER_PREFETCH_COUNT=%s", max(1, WORKER_PREFETCH_COUNT))
+    logger.info(
+        "WORKER_CONCURRENCY_LIMITS ocr=%s transcription=%s retry_budget_transient=%s retry_budget_media=%s retry_budget_default=%s",
+        WORKER_MAX_INFLIGHT_OCR,
+        WORKER_MAX_INFLIGHT_TRANSCRIPTION,
+        RETRY_BUDGET_TRANSIENT,
+        RETRY_BUDGET_MEDIA,
+        RETRY_BUDGET_DEFAULT,
+    )
+    logger.info("WORKER_JOB_THREADS=%s", WORKER_JOB_THREADS)
+    logger.info(
+        "WORKER_SCHEDULER policy=%s max_consecutive=%s active_depth_min=%s",
+        WORKER_SCHEDULER_POLICY,
+        max(1, WORKER_SCHEDULER_MAX_CONSECUTIVE),
+        max(0, WORKER_SCHEDULER_ACTIVE_DEPTH_MIN),
+    )
+    logger.info("WORKER_ID=%s", worker_identity)
+
+    r = connect_redis()
+    r_block = connect_queue_redis()
+    if WORKER_CANCEL_PUBSUB:
+        start_cancel_listener(r)
+    start_processing_owner_heartbeat(r)
+    recover_processing_lists(r_block, queue_targets())
+
+    executor = ThreadPoolExecutor(max_workers=WORKER_JOB_THREADS, thread_name_prefix="doc-job")
+    in_flight: set[Future] = set()
+
+    # =========================================================
+    # MAIN LOOP
+    # =========================================================
+    while True:
+        queue = ""
+        job_raw = None
+        job = None
+        admitted = False
         try:
-            jt = _job_type(job) if "job" in locals() and isinstance(job, dict) else "OTHER"
-            r.srem(inflight_set_key(jt), job_id)
-        except Exception:
-            logger.warning("Failed to clear inflight marker for cancelled job_id=%s", job_id if "job_id" in locals() else "UNKNOWN")
-        if "job_id" in locals():
+            if in_flight:
+                in_flight = {f for f in in_flight if not f.done()}
+            if len(in_flight) >= WORKER_JOB_THREADS:
+                _, pending = wait(in_flight, return_when=FIRST_COMPLETED)
+                in_flight = set(pending)
+                continue
+
+            if WORKER_PROCESSING_LIST and orphan_sweep_due():
+                try:
+                    recover_orphaned_processing_lists(r_block, queue_targets())
+                except Exception as e:
+                    logger.warning("Orphaned processing list sweep failed: %s", e)
+
+            if _prefetched_jobs:
+                result = _prefetched_jobs.popleft()
+                waited = 0.0
+            else:
+                targets = scheduled_queue_targets(r)
+                snapshot = scheduler_snapshot(r, queue_targets())
+                logger.info(
+                    "Entering BRPOP wait targets=%s scheduler_policy=%s streak=%s last_queue=%s depths=%s",
+                    targets,
+                    snapshot["policy"],
+                    snapshot["last_streak"],
+                    snapshot["last_queue"],
+                    snapshot["depths"],
+                )
+
+                start_wait = time.monotonic()
+                try:
+                    result = pop_queued_job(r_block, targets, BRPOP_TIMEOUT, WORKER_JOB_THREADS - len(in_flight))
+                except (socket.timeout, redis.exceptions.TimeoutError, redis.exceptions.ConnectionError) as e:
+                    waited = round(time.monotonic() - start_wait, 2)
+                    logger.warning("Redis socket timeout after %ss — reconnecting (%s)", waited, e)
+                    try:
+                        r_block.close()
+                    except Exception:
+                        pass
+                    r_block = connect_queue_redis()
+                    continue
+
+                waited = round(time.monotonic() - start_wait, 2)
+
+            if result is None:
+                now = time.monotonic()
+                if now >= _next_heartbeat_ts:
+                    _next_heartbeat_ts = now + HEARTBEAT_INTERVAL_SEC
+                    logger.info("Worker heartbeat idle BRPOP timeout after %ss in_flight=%s", waited, len(in_flight))
+                    log_redis_health(r, prefix="[heartbeat] ")
+                time.sleep(0.1)
+                continue
+
+            queue_raw, job_raw = result
+            queue = queue_raw.decode("utf-8")
+            active_dlq = dlq_for_queue(queue)
+            source_label = queue_source_label(queue)
+            mark_dequeue(queue)
+            if health_log_due():
+                log_queue_depths(r)
+                log_redis_health(r, prefix="[job-received] ")
+
+            job = json_codec.loads(job_raw)
+            job_id = job.get("job_id", "UNKNOWN")
+            request_id = str(job.get("request_id") or "").strip()
+            key = f"job_status:{job_id}"
+
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Job received after %.2fs queue=%s source=%s dlq=%s job_id=%s request_id=%s payload_keys=%s",
+                    waited,
+                    queue,
+                    source_label,
+                    active_dlq,
+                    job_id,
+                    request_id or "-",
+                    list(job),
+                )
+            job_type = _job_type(job)
+            current_attempt = int(job.get("attempts", 0) or 0)
+            max_allowed = inflight_limit_for(job_type)
+            inflight_key = inflight_set_key(job_type)
+            if max_allowed <= 0:
+                delay, hits = next_requeue_delay(job_id)
+                logger.warning(
+                    "Job %s blocked by zero inflight limit for type=%s queue=%s; requeueing delay=%.2fs hits=%s",
+                    job_id,
+                    job_type,
+                    queue,
+                    delay,
+                    hits,
+                )
+                requeue_job(r_block, queue, job_raw)
+                time.sleep(delay)
+                continue
+            try:
+                inflight_now = int(r.scard(inflight_key) or 0)
+            except Exception:
+                inflight_now = 0
+            if inflight_now >= max_allowed:
+                inflight_now = prune_stale_inflight_markers(r, inflight_key)
+            if inflight_now >= max_allowed:
+                delay, hits = next_requeue_delay(job_id)
+                logger.info(
+                    "inflight_limit_hit type=%s limit=%s current=%s queue=%s job_id=%s requeue=true delay=%.2fs hits=%s",
+                    job_type,
+                    max_allowed,
+                    inflight_now,
+                    queue,
+                    job_id,
+                    delay,
+                    hits,
+                )
+                requeue_job(r_block, queue, job_raw)
+                if wait_for_inflight_capacity(r, job_type, delay, max_allowed):
+                    logger.info("inflight_capacity_signal type=%s job_id=%s woke_early=true", job_type, job_id)
+                continue
             clear_requeue_state(job_id)
-        incr("worker_jobs_cancelled_total", queue=queue if "queue" in locals() else "UNKNOWN")
-        log_stage_event(job_id=job_id, request_id=request_id if "request_id" in locals() else "", stage="JOB_EXECUTION", event="CANCELLED")
-        try:
-            ok, prev_status, _ = guarded_hset(
-                r,
-                key=key,
-                mapping={
-                    "contract_version": CONTRACT_VERSION,
-                    "request_id": request_id,
-                    "status": "CANCELLED",
-                    "stage": "Cancelled by user",
-                    "progress": 100,
-                    "updated_at": datetime.utcnow().isoformat(),
-                    "error_code": "CANCELLED_BY_USER",
-                    "error_message": "Job was cancelled by user.",
-                    "error_detail": "",
-                    "error": "Job was cancelled by user.",
-                },
-                context="WORKER_CANCELLED_EXCEPTION",
+            r.sadd(inflight_key, job_id)
+            admitted = True
+            r.expire(inflight_key, 86400)
+            metric_labels = (("job_type", str(job.get("job_type", "UNKNOWN"))),) + (
+                _LABELS_BY_QUEUE.get(queue) or (("queue", queue), ("source", source_label))
+            )
+            incr_labels("worker_jobs_received_total", metric_labels)
+            log_stage_event(
+                job_id=job_id,
                 request_id=request_id,
+                stage="JOB_RECEIVED",
+                event="STARTED",
+                queue=queue,
+                source_label=source_label,
             )
-            if not ok:
-                logger.warning("Cancelled status update blocked job_id=%s from=%s", job_id, prev_status)
-        except Exception:
-            logger.exception("Failed to mark job cancelled")
-        time.sleep(0.2)
 
-    except Exception as e:
-        logger.exception("Worker error")
-        try:
-            if "job_id" in locals():
-                jt = _job_type(job) if "job" in locals() and isinstance(job, dict) else "OTHER"
-                r.srem(inflight_set_key(jt), job_id)
-        except Exception:
-            logger.warning("Failed to clear inflight marker for failed job_id=%s", job_id if "job_id" in locals() else "UNKNOWN")
-        if "job_id" in locals():
-            clear_requeue_state(job_id)
-        incr(
-            "worker_jobs_failed_total",
-            queue=queue if "queue" in locals() else "UNKNOWN",
-            job_type=job.get("job_type", "UNKNOWN") if "job" in locals() and isinstance(job, dict) else "UNKNOWN",
-        )
-        log_stage_event(
-            job_id=job_id if "job_id" in locals() else "UNKNOWN",
-            request_id=request_id if "request_id" in locals() else "",
-            stage="JOB_EXECUTION",
-            event="FAILED",
-            error=f"{e.__class__.__name__}: {e}",
-        )
-
-        try:
-            if "job_id" in locals():
-                if is_cancelled(job_id, r=r):
-                    ok, prev_status, _ = guarded_hset(
-                        r,
-                        key=key,
-                        mapping={
-                            "contract_version": CONTRACT_VERSION,
-                            "request_id": request_id,
-                            "status": "CANCELLED",
-                            "stage": "Cancelled by user",
-                            "updated_at": datetime.utcnow().isoformat(),
-                            "error_code": "CANCELLED_BY_USER",
-                            "error_message": "Job was cancelled by user.",
-                            "error_detail": "",
-                            "error": "Job was cancelled by user.",
-                        },
-                        context="WORKER_ERROR_CANCELLED",
-                        request_id=request_id,
-                    )
-                    if not ok:
-                        logger.warning("Post-error cancelled update blocked job_id=%s from=%s", job_id, prev_status)
-                    logger.info(f"Job {job_id} cancelled (post-error path)")
-                else:
-                    error_code, error_message = classify_error(e)
-                    error_detail = f"{e.__class__.__name__}: {e}"
-                    latest = r.hgetall(key) if key else {}
-                    failed_stage = (latest.get("stage") or "Processing failed").strip()
-                    recovery = decide_recovery_action(
-                        error_code=error_code,
-                        attempts=current_attempt if "current_attempt" in locals() else 0,
-                        budget_transient=RETRY_BUDGET_TRANSIENT,
-                        budget_media=RETRY_BUDGET_MEDIA,
-                        budget_default=RETRY_BUDGET_DEFAULT,
-                    )
-                    retry_allowed = bool(recovery["retry_allowed"])
-                    retry_budget = int(recovery["recovery_max_attempts"])
-                    if retry_allowed:
-                        next_attempt = int(recovery["recovery_attempt"])
-                        backoff = min(5.0, 0.5 * (2 ** max(0, next_attempt - 1)))
-                        ok, prev_status, _ = guarded_hset(
-                            r,
-                            key=key,
-                            mapping={
-                                "contract_version": CONTRACT_VERSION,
-                                "request_id": request_id,
-                                "status": "QUEUED",
-                                "stage": f"Retry scheduled ({next_attempt}/{retry_budget})",
-                                "updated_at": datetime.utcnow().isoformat(),
-                                "error_code": error_code,
-                                "error_message": error_message,
-                                "error_detail": error_detail,
-                                "error": error_message,
-                                "recovery_action": str(recovery["recovery_action"]),
-                                "recovery_reason": str(recovery["recovery_reason"]),
-                                "recovery_attempt": str(recovery["recovery_attempt"]),
-                                "recovery_max_attempts": str(recovery["recovery_max_attempts"]),
-                                "recovery_trace": json.dumps(
-                                    [
-                                        {
-                                            "action": str(recovery["recovery_action"]),
-                                            "reason": str(recovery["recovery_reason"]),
-                                            "attempt": int(recovery["recovery_attempt"]),
-                                            "max_attempts": int(recovery["recovery_max_attempts"]),
-                                        }
-                                    ],
-                                    ensure_ascii=False,
-                                ),
-                            },
-                            context="WORKER_RETRY_REQUEUE",
-                            request_id=request_id,
-                        )
-                        if not ok:
-                            logger.warning("Retry status update blocked job_id=%s from=%s", job_id, prev_status)
-                        retry_payload = dict(job)
-                        retry_payload["attempts"] = next_attempt
-                        retry_payload["max_attempts"] = retry_budget
-                        retry_payload["recovery_action"] = str(recovery["recovery_action"])
-                        retry_payload["recovery_reason"] = str(recovery["recovery_reason"])
-                        retry_payload["recovery_attempt"] = str(recovery["recovery_attempt"])
-                        retry_payload["recovery_max_attempts"] = str(recovery["recovery_max_attempts"])
-                        retry_payload["recovery_trace"] = json.dumps(
-                            [
-                                {
-                                    "action": str(recovery["recovery_action"]),
-                                    "reason": str(recovery["recovery_reason"]),
-                                    "attempt": int(recovery["recovery_attempt"]),
-                                    "max_attempts": int(recovery["recovery_max_attempts"]),
-                                }
-                            ],
-                            ensure_ascii=False,
-                        )
-                        logger.warning(
-                            "Retrying job_id=%s request_id=%s error_code=%s attempt=%s/%s backoff_sec=%.2f",
-                            job_id,
-                            request_id,
-                            error_code,
-                            next_attempt,
-                            retry_budget,
-                            backoff,
-                        )
-                        time.sleep(backoff)
-                        r.rpush(queue if "queue" in locals() else QUEUE_NAME, json.dumps(retry_payload, ensure_ascii=False))
-                        continue
-                    ok, prev_status, _ = guarded_hset(
-                        r,
-                        key=key,
-                        mapping={
-                            "contract_version": CONTRACT_VERSION,
-                            "request_id": request_id,
-                            "status": "FAILED",
-                            "stage": "Processing failed",
-                            "error_code": error_code,
-                            "error_message": error_message,
-                            "error_detail": error_detail,
-                            "error": error_message,
-                            "recovery_action": "fail_fast_dlq",
-                            "recovery_reason": str(recovery["recovery_reason"]),
-                            "recovery_attempt": str(recovery["recovery_attempt"]),
-                            "recovery_max_attempts": str(recovery["recovery_max_attempts"]),
-                            "recovery_trace": json.dumps(
-                                [
-                                    {
-                                        "action": "fail_fast_dlq",
-                                        "reason": str(recovery["recovery_reason"]),
-                                        "attempt": int(recovery["recovery_attempt"]),
-                                        "max_attempts": int(recovery["recovery_max_attempts"]),
-                                    }
-                                ],
-                                ensure_ascii=False,
-                            ),
-                            "updated_at": datetime.utcnow().isoformat(),
-                        },
-                        context="WORKER_ERROR_FAILED",
-                        request_id=request_id,
-                    )
-                    if not ok:
-                        logger.warning("Failed status update blocked job_id=%s from=%s", job_id, prev_status)
-                    target_dlq = active_dlq if "active_dlq" in locals() else DLQ_NAME
-                    if "job" in locals() and isinstance(job, dict):
-                        job["recovery_action"] = "fail_fast_dlq"
-                        job["recovery_reason"] = str(recovery["recovery_reason"])
-                        job["recovery_attempt"] = str(recovery["recovery_attempt"])
-                        job["recovery_max_attempts"] = str(recovery["recovery_max_attempts"])
-                        job["recovery_trace"] = json.dumps(
-                            [
-                                {
-                                    "action": "fail_fast_dlq",
-                                    "reason": str(recovery["recovery_reason"]),
-                                    "attempt": int(recovery["recovery_attempt"]),
-                                    "max_attempts": int(recovery["recovery_max_attempts"]),
-                                }
-                            ],
-                            ensure_ascii=False,
-                        )
-                    dlq_payload = build_dead_letter_entry(
-                        job=job,
-                        queue_name=queue if "queue" in locals() else "UNKNOWN",
-                        dlq_name=target_dlq,
-                        source_label=source_label if "source_label" in locals() else "UNKNOWN",
-                        error_code=error_code,
-                        error_message=error_message,
-                        error_detail=error_detail,
-                        failed_stage=failed_stage,
-                        worker_id=worker_identity,
-                    )
-                    log_stage_event(
-                        job_id=job_id,
-                        request_id=request_id,
-                        stage="DLQ_ENQUEUE",
-                        event="STARTED",
-                        dlq_name=target_dlq,
-                        error_code=error_code,
-                    )
-                    r.lpush(target_dlq, json.dumps(dlq_payload, ensure_ascii=False))
-                    log_stage_event(
-                        job_id=job_id,
-                        request_id=request_id,
-                        stage="DLQ_ENQUEUE",
-                        event="COMPLETED",
-                        dlq_name=target_dlq,
-                        error_code=error_code,
-                        attempts=dlq_payload.get("attempts"),
-                        max_attempts=dlq_payload.get("max_attempts"),
-                    )
-                    logger.error(
-                        "Job %s request_id=%s moved to DLQ=%s error_code=%s stage=%s detail=%s attempts=%s/%s",
-                        job_id,
-                        request_id,
-                        target_dlq,
-                        error_code,
-                        failed_stage,
-                        error_detail,
-                        dlq_payload.get("attempts"),
-                        dlq_payload.get("max_attempts"),
-                    )
-        except Exception:
-            logger.exception("Failure during error handling")
+            future = executor.submit(
+                _process_job,
+                r,
+                JobCtx(
+                    job=job,
+                    job_raw=job_raw,
+                    job_id=job_id,
+                    request_id=request_id,
+                    key=key,
+                    queue=queue,
+                    active_dlq=active_dlq,
+                    source_label=source_label,
+                    job_type=job_type,
+                    current_attempt=current_attempt,
+                    metric_labels=metric_labels,
+                ),
+            )
+            future.add_done_callback(_log_job_future)
+            in_flight.add(future)
+            job_raw = None
 
-        time.sleep(2)
+        except Exception as e:
+            logger.exception("Worker error")
+            if job_raw is not None and isinstance(job, dict) and queue:
+                _handle_admission_error(r, r_block, _admission_ctx(job, job_raw, queue), e, admitted=admitted)
+            elif job_raw is not None and queue:
+                # Unparseable payloads were never retried; keep them out of recovery too.
+                try:
+                    ack_job(r_block, queue, job_raw)
+                except Exception:
+                    logger.warning("Failed to drop unparseable payload from processing list queue=%s", queue)
+            time.sleep(2)
+
+
+if __name__ == "__main__":
+    main()